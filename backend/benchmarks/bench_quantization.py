@@ -0,0 +1,80 @@
+import argparse
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+from benchmarks.bench_vector_store import make_rows, make_store
+from utils.vectors import distances, top_k
+
+MODES = {"postgres": ["none", "halfvec", "binary"], "local": ["none", "int8"]}
+
+
+def ground_truth(vectors: np.ndarray, queries: np.ndarray, metric: str, k: int) -> list[set[int]]:
+    sq_norms = np.einsum("ij,ij->i", vectors, vectors)
+    return [set(top_k(distances(vectors, query, metric, sq_norms), k).tolist()) for query in queries]
+
+
+def bench_mode(store, table: str, queries: np.ndarray, truth: list[set[int]], metric: str, k: int):
+    store.search(table, queries[0], metric=metric, limit=k)
+    recalls = []
+    start = time.perf_counter()
+    for query, expected in zip(queries, truth):
+        found = {int(row[1].rsplit(" ", 1)[1]) for row in store.search(table, query, metric=metric, limit=k)}
+        recalls.append(len(found & expected) / len(expected))
+    elapsed = time.perf_counter() - start
+    return len(queries) / elapsed, float(np.mean(recalls))
+
+
+def footprint(stats: dict) -> str:
+    if "indexes" in stats:
+        indexes = ", ".join(f"{name} {size / 2**20:.1f} MiB" for name, size in stats["indexes"].items() if "embedding" in name)
+        return f"table {stats['table_bytes'] / 2**20:.1f} MiB; {indexes or 'no vector index'}"
+    quantized = stats["quantized_bytes"]
+    scanned = quantized if quantized is not None else stats["vector_bytes"]
+    return f"first-stage scan {scanned / 2**20:.1f} MiB, float32 matrix {stats['vector_bytes'] / 2**20:.1f} MiB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantized storage: memory footprint, QPS and recall@k against full-precision vectors")
+    parser.add_argument("backends", nargs="*", default=["postgres"], choices=list(MODES))
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--metric", default="cosine", choices=["cosine", "l2"])
+    parser.add_argument("--table", default="bench_quantization")
+    args = parser.parse_args()
+
+    load_dotenv()
+    rows, vectors = make_rows(args.rows, args.dim)
+    queries = np.random.default_rng(1).standard_normal((args.queries, args.dim)).astype(np.float32)
+    truth = ground_truth(vectors, queries, args.metric, args.k)
+
+    for backend in args.backends:
+        print(backend)
+        store = make_store(backend)
+        if backend == "local":
+            store.hnsw_threshold = args.rows + 1
+        try:
+            store.drop_table(args.table)
+            store.create_vector_table(args.table, args.dim)
+            store.bulk_add_documents(args.table, rows)
+
+            for mode in MODES[backend]:
+                if mode == "none" and backend == "postgres":
+                    build = store.create_index(args.table, method="hnsw", metric=args.metric)
+                else:
+                    build = store.set_quantization(args.table, mode, metric=args.metric)
+                qps, recall = bench_mode(store, args.table, queries, truth, args.metric, args.k)
+                print(
+                    f"  {mode:<8} {qps:10.1f} queries/sec  recall@{args.k} {recall:.4f}  "
+                    f"build {build['build_seconds']:.1f}s  ({footprint(store.storage_stats(args.table))})"
+                )
+        finally:
+            store.drop_table(args.table)
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
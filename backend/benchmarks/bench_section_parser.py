@@ -0,0 +1,168 @@
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup, Tag, NavigableString, Comment
+
+from crawlers.parser import SectionParser
+
+class LegacySectionParser:
+    def _is_heading_tag(self, el):
+        return isinstance(el, Tag) and re.fullmatch(r"h[1-6]", el.name or "")
+
+    def _is_inside_ignored_box(self, tag):
+        for anc in tag.parents:
+            classes = anc.get("class") or []
+            if any(c in ("infobox", "navbox", "vertical-navbox", "toc", "metadata") for c in classes):
+                return True
+        return False
+
+    def _collect_lead_text(self, content, first_heading):
+        parts = []
+        for ch in content.children:
+            if ch is first_heading:
+                break
+            if not isinstance(ch, Tag):
+                continue
+            for p in ch.find_all(["p", "li", "dd", "dt"]):
+                if self._is_inside_ignored_box(p):
+                    continue
+                t = p.get_text(" ", strip=True)
+                t = re.sub(r'\[\s*\d+\s*\]', '', t)
+                t = re.sub(r'\n', ' ', t)
+                if t:
+                    parts.append(t)
+        return " ".join(parts).strip()
+
+    def _collect_text_for_heading(self, h, h_level):
+        parts = []
+        for el in h.next_elements:
+            if isinstance(el, Comment):
+                continue
+            if isinstance(el, NavigableString):
+                continue
+
+            if self._is_heading_tag(el):
+                try:
+                    lvl = int(el.name[1])
+                except:
+                    lvl = 1
+                if lvl <= h_level:
+                    break
+                else:
+                    continue
+
+            if not isinstance(el, Tag):
+                continue
+
+            if self._is_inside_ignored_box(el):
+                continue
+
+            if el.name in ("p", "li", "dd", "dt"):
+                t = el.get_text(" ", strip=True)
+                t = re.sub(r'\[\s*\d+\s*\]', '', t)
+                t = re.sub(r'\n', ' ', t)
+                if t:
+                    parts.append(t)
+
+        return " ".join(parts).strip()
+
+    def parse_sections_by_headings(self, html):
+        soup = BeautifulSoup(html, "html.parser")
+        content = soup.select_one("div#mw-content-text .mw-parser-output") or soup.select_one("#mw-content-text")
+        if not content:
+            raise RuntimeError("Nie znaleziono kontenera artykułu")
+
+        headings = [h for h in content.find_all(re.compile(r"^h[1-6]$"))]
+
+        sections = []
+
+        if headings:
+            first = headings[0]
+            lead_text = self._collect_lead_text(content, first)
+            sections.append({"title": "", "level": 1, "text": lead_text})
+        else:
+            whole_parts = []
+            for p in content.find_all(["p", "li", "dd", "dt"]):
+                if self._is_inside_ignored_box(p):
+                    continue
+                t = p.get_text(" ", strip=True)
+                t = re.sub(r'\[\s*\d+\s*\]', '', t)
+                t = re.sub(r'\n', ' ', t)
+                if t:
+                    whole_parts.append(t)
+            sections.append({"title": "", "level": 1, "text": " ".join(whole_parts).strip()})
+            return sections
+
+        for h in headings:
+            try:
+                h_level = int(h.name[1])
+            except:
+                h_level = 2
+            headline = h.get_text(strip=True)
+            text = self._collect_text_for_heading(h, h_level)
+            sections.append({"title": headline, "level": h_level, "text": text})
+        return sections
+
+
+def make_article(sections: int, paragraphs: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = "historia miasto rzeka zamek król wojna kościół przemysł kolej kultura".split()
+
+    def paragraph():
+        return " ".join(rng.choices(words, k=60)) + f" [{rng.randint(1, 99)}]"
+
+    parts = ['<html><body><div id="mw-content-text"><div class="mw-parser-output">']
+    parts.append('<table class="infobox"><tr><td><p>infobox</p></td></tr></table>')
+    parts.extend(f"<p>{paragraph()}</p>" for _ in range(3))
+    for i in range(sections):
+        parts.append(f'<div class="mw-heading mw-heading2"><h2>Sekcja {i}</h2></div>')
+        parts.extend(f"<p>{paragraph()}</p>" for _ in range(paragraphs))
+        parts.append(f"<h3>Podsekcja {i}</h3>")
+        parts.append("<ul>" + "".join(f"<li>{paragraph()}</li>" for _ in range(paragraphs)) + "</ul>")
+    parts.append('<div class="navbox"><ul><li>nav</li></ul></div>')
+    parts.append("</div></div></body></html>")
+    return "".join(parts)
+
+
+def bench(label: str, parse, html: str, repeat: int) -> list[dict]:
+    best = float("inf")
+    result = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parse(html)
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<24} {best * 1000:10.1f} ms  ({len(result)} sections)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Section parser: legacy per-heading scan vs single pass")
+    parser.add_argument("files", nargs="*", type=Path, help="saved article HTML files")
+    parser.add_argument("--sections", type=int, default=80)
+    parser.add_argument("--paragraphs", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    fixtures = [(path.name, path.read_text(encoding="utf-8")) for path in args.files]
+    if not fixtures:
+        fixtures = [("synthetic", make_article(args.sections, args.paragraphs))]
+
+    backends = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+        backends.append("lxml")
+    except ImportError:
+        pass
+
+    for name, html in fixtures:
+        print(f"{name} ({len(html) / 1024:.0f} KiB)")
+        bench("legacy html.parser", LegacySectionParser().parse_sections_by_headings, html, args.repeat)
+        for features in backends:
+            bench(f"single-pass {features}", SectionParser(features).parse_sections_by_headings, html, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import random
+import time
+
+from services.text_service import TextEncoder
+
+WORDS = (
+    "historia miasto rzeka zamek król wojna kościół uniwersytet przemysł kolej "
+    "ludność gospodarka kultura sztuka muzeum park dzielnica ulica most rynek"
+).split()
+
+
+def make_documents(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(5, 300))) for _ in range(n)]
+
+
+def bench(label: str, fn, documents: list[str], repeat: int):
+    fn(documents[:8])
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(documents)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<12} {len(documents) / best:10.1f} docs/sec  ({best:.3f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TextEncoder throughput: per-document vs batched")
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    args = parser.parse_args()
+
+    encoder = TextEncoder(args.model, batch_size=args.batch_size)
+    documents = make_documents(args.docs)
+
+    bench("per-doc", lambda docs: [encoder.encoder.encode(d).tolist() for d in docs], documents, args.repeat)
+    bench("batched", encoder.encode, documents, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import argparse
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+from database import Database
+from local_store import LocalVectorStore
+
+
+def make_store(backend: str):
+    if backend == "local":
+        return LocalVectorStore(os.getenv("LOCAL_STORE_DIR", "local_store"))
+    prefix = backend.upper()
+    return Database(
+        db_type=backend,
+        host=os.getenv(f"{prefix}_HOST", "localhost"),
+        port=int(os.getenv(f"{prefix}_PORT", "5432" if backend == "postgres" else "3306")),
+        user=os.getenv(f"{prefix}_USER", backend),
+        password=os.getenv(f"{prefix}_PASSWORD"),
+        db_name=os.getenv(f"{prefix}_DB", "test"),
+        pool=True,
+    )
+
+
+def make_rows(n: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    rows = [
+        {"title": f"Document {i}", "content": f"synthetic document {i}", "content_hash": f"{i:032x}", "embedding": vector}
+        for i, vector in enumerate(vectors)
+    ]
+    return rows, vectors
+
+
+def bench_search(store, table: str, queries: np.ndarray, metric: str, limit: int):
+    store.search(table, queries[0], metric=metric, limit=limit)
+    latencies = []
+    start = time.perf_counter()
+    for query in queries:
+        t = time.perf_counter()
+        store.search(table, query, metric=metric, limit=limit)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+    print(f"  search     {len(queries) / elapsed:10.1f} queries/sec  (p50 {p50:.2f} ms, p95 {p95:.2f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector store add/search throughput for postgres, mysql and local backends")
+    parser.add_argument("backends", nargs="*", default=["postgres"], choices=["postgres", "mysql", "local"])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--metric", default="cosine", choices=["cosine", "l2"])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--table", default="bench_vectors")
+    parser.add_argument("--recall", action="store_true", help="also report recall@limit of the approximate path")
+    args = parser.parse_args()
+
+    load_dotenv()
+    rows, vectors = make_rows(args.rows, args.dim)
+    queries = vectors[np.random.default_rng(1).choice(len(vectors), size=args.queries)]
+
+    for backend in args.backends:
+        print(backend)
+        store = make_store(backend)
+        try:
+            store.drop_table(args.table)
+            store.create_vector_table(args.table, args.dim)
+
+            ingest = store.bulk_add_documents(args.table, rows, chunk_size=args.chunk_size)
+            print(f"  add        {ingest['rows_per_sec']:10.1f} rows/sec     ({ingest['seconds']:.3f}s)")
+
+            bench_search(store, args.table, queries, args.metric, args.limit)
+            if args.recall:
+                report = store.evaluate_recall(args.table, metric=args.metric, k=args.limit)
+                print(f"  recall@{args.limit:<3} {report['recall']}  (approx {report['approx_ms_per_query']} ms, exact {report['exact_ms_per_query']} ms)")
+        finally:
+            store.drop_table(args.table)
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,20 @@
-from .crawler import Crawler
+from .crawler import Crawler, FetchResult, HttpFetcher, PageFetcher
+from .parser import SectionParser, section_parser
+from .browser_pool import BrowserPool, browser_pool
+from .frontier import SiteCrawler, FetchedPage, BloomFilter, HostRateLimiter, normalize_url
 
-__all__ = ["Crawler"]
\ No newline at end of file
+__all__ = [
+    "Crawler",
+    "FetchResult",
+    "HttpFetcher",
+    "PageFetcher",
+    "SectionParser",
+    "section_parser",
+    "BrowserPool",
+    "browser_pool",
+    "SiteCrawler",
+    "FetchedPage",
+    "BloomFilter",
+    "HostRateLimiter",
+    "normalize_url",
+]
\ No newline at end of file
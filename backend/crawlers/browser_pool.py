@@ -0,0 +1,118 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from loguru import logger
+
+from crawlers.crawler import Crawler
+
+class BrowserPool:
+    def __init__(self, size: int = 2, max_pages: int = 50, base_port: int = 9226, scroll_limit: int = 5, timeout: float = 120.0):
+        self.size = size
+        self.max_pages = max_pages
+        self.scroll_limit = scroll_limit
+        self.timeout = timeout
+
+        self._idle: deque[Crawler] = deque()
+        self._free_ports = deque(range(base_port, base_port + size))
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = {"launched": 0, "recycled": 0, "failures": 0, "leases": 0, "lease_wait_seconds": 0.0}
+
+    def _launch(self, port: int) -> Crawler:
+        try:
+            crawler = Crawler(scroll_limit=self.scroll_limit, debugging_port=port)
+        except Exception:
+            with self._cond:
+                self._free_ports.append(port)
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["launched"] += 1
+        logger.info(f"Launched browser on debugging port {port}")
+        return crawler
+
+    def _retire(self, crawler: Crawler):
+        crawler.close()
+        with self._cond:
+            self._free_ports.append(crawler.debugging_port)
+            self._stats["recycled"] += 1
+            self._cond.notify()
+
+    def _acquire(self) -> Crawler:
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                if self._idle:
+                    crawler = self._idle.popleft()
+                    break
+                if self._free_ports:
+                    port = self._free_ports.popleft()
+                    crawler = None
+                    break
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise TimeoutError(f"No browser available after {self.timeout} sec")
+            self._stats["leases"] += 1
+            self._stats["lease_wait_seconds"] += time.monotonic() - start
+
+        return crawler if crawler is not None else self._launch(port)
+
+    def _release(self, crawler: Crawler, failed: bool):
+        if failed:
+            with self._cond:
+                self._stats["failures"] += 1
+        if failed or self._closed or crawler.pages_served >= self.max_pages:
+            self._retire(crawler)
+            return
+        with self._cond:
+            self._idle.append(crawler)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self):
+        crawler = self._acquire()
+        failed = False
+        try:
+            yield crawler
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(crawler, failed)
+
+    def warm(self, count: int | None = None):
+        crawlers = [self._acquire() for _ in range(min(count or self.size, self.size))]
+        for crawler in crawlers:
+            self._release(crawler, failed=False)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                **self._stats,
+                "size": self.size,
+                "idle": len(self._idle),
+                "running": self.size - len(self._free_ports),
+                "max_pages": self.max_pages,
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for crawler in idle:
+            self._retire(crawler)
+
+
+browser_pool = BrowserPool(
+    size=int(os.getenv("BROWSER_POOL_SIZE", "2")),
+    max_pages=int(os.getenv("BROWSER_MAX_PAGES", "50")),
+    base_port=int(os.getenv("BROWSER_BASE_PORT", "9226")),
+)
+
+__all__ = ["BrowserPool", "browser_pool"]
@@ -5,14 +5,25 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions
 from tempfile import mkdtemp
-import time
-from bs4 import BeautifulSoup, Tag, NavigableString, Comment
+from collections import OrderedDict
+from typing import NamedTuple
 import re
+import shutil
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from crawlers.parser import section_parser
 
 chromedriver_autoinstaller.install()
 
+CONTENT_SELECTOR = "div#mw-content-text .mw-parser-output"
+CONTENT_MARKER_RE = re.compile(r'class="[^"]*\bmw-parser-output\b')
+
 class Crawler:
-    def __init__(self, scroll_limit: int = 5):
+    def __init__(self, scroll_limit: int = 5, debugging_port: int = 9226):
+        self.temp_dirs = [mkdtemp(prefix="crawler-") for _ in range(3)]
         options = webdriver.ChromeOptions()
         options.add_argument("--no-sandbox")
         options.add_argument("--headless=new")
@@ -23,13 +34,20 @@ class Crawler:
         options.add_argument("--disable-extensions")
         options.add_argument("--disable-background-networking")
         options.add_argument("--ignore-certificate-errors")
-        options.add_argument(f"--user-data-dir={mkdtemp()}")
-        options.add_argument(f"--data-path={mkdtemp()}")
-        options.add_argument(f"--disk-cache-dir={mkdtemp()}")
-        options.add_argument("--remote-debugging-port=9226")
+        options.add_argument(f"--user-data-dir={self.temp_dirs[0]}")
+        options.add_argument(f"--data-path={self.temp_dirs[1]}")
+        options.add_argument(f"--disk-cache-dir={self.temp_dirs[2]}")
+        options.add_argument(f"--remote-debugging-port={debugging_port}")
 
         self.scroll_limit = scroll_limit
-        self.driver = webdriver.Chrome(options=options)
+        self.debugging_port = debugging_port
+        self.pages_served = 0
+        self.parser = section_parser
+        try:
+            self.driver = webdriver.Chrome(options=options)
+        except Exception:
+            self._remove_temp_dirs()
+            raise
 
     def scroll_page(self):
         current_scroll = 0
@@ -46,107 +64,14 @@ class Crawler:
     def fetch_html(self, url):
         self.driver.get(url)
         WebDriverWait(self.driver, 15).until(
-            expected_conditions.presence_of_element_located((By.CSS_SELECTOR, "div#mw-content-text .mw-parser-output"))
+            expected_conditions.presence_of_element_located((By.CSS_SELECTOR, CONTENT_SELECTOR))
         )
         time.sleep(0.5)
+        self.pages_served += 1
         return self.driver.page_source
 
-    def _is_heading_tag(self, el):
-        return isinstance(el, Tag) and re.fullmatch(r"h[1-6]", el.name or "")
-
-    def _is_inside_ignored_box(self, tag):
-        for anc in tag.parents:
-            classes = anc.get("class") or []
-            if any(c in ("infobox", "navbox", "vertical-navbox", "toc", "metadata") for c in classes):
-                return True
-        return False
-
-    def _collect_lead_text(self, content, first_heading):
-        parts = []
-        for ch in content.children:
-            if ch is first_heading:
-                break
-            if not isinstance(ch, Tag):
-                continue
-            for p in ch.find_all(["p", "li", "dd", "dt"]):
-                if self._is_inside_ignored_box(p):
-                    continue
-                t = p.get_text(" ", strip=True)
-                t = re.sub(r'\[\s*\d+\s*\]', '', t)
-                t = re.sub(r'\n', ' ', t)
-                if t:
-                    parts.append(t)
-        return " ".join(parts).strip()
-
-    def _collect_text_for_heading(self, h, h_level):
-        parts = []
-        for el in h.next_elements:
-            if isinstance(el, Comment):
-                continue
-            if isinstance(el, NavigableString):
-                continue
-
-            if self._is_heading_tag(el):
-                try:
-                    lvl = int(el.name[1])
-                except:
-                    lvl = 1
-                if lvl <= h_level:
-                    break
-                else:
-                    continue
-
-            if not isinstance(el, Tag):
-                continue
-
-            if self._is_inside_ignored_box(el):
-                continue
-
-            if el.name in ("p", "li", "dd", "dt"):
-                t = el.get_text(" ", strip=True)
-                t = re.sub(r'\[\s*\d+\s*\]', '', t)
-                t = re.sub(r'\n', ' ', t)
-                if t:
-                    parts.append(t)
-
-        return " ".join(parts).strip()
-
     def parse_sections_by_headings(self, html):
-        soup = BeautifulSoup(html, "html.parser")
-        content = soup.select_one("div#mw-content-text .mw-parser-output") or soup.select_one("#mw-content-text")
-        if not content:
-            raise RuntimeError("Nie znaleziono kontenera artykułu")
-
-        headings = [h for h in content.find_all(re.compile(r"^h[1-6]$"))]
-
-        sections = []
-
-        if headings:
-            first = headings[0]
-            lead_text = self._collect_lead_text(content, first)
-            sections.append({"title": "", "level": 1, "text": lead_text})
-        else:
-            whole_parts = []
-            for p in content.find_all(["p", "li", "dd", "dt"]):
-                if self._is_inside_ignored_box(p):
-                    continue
-                t = p.get_text(" ", strip=True)
-                t = re.sub(r'\[\s*\d+\s*\]', '', t)
-                t = re.sub(r'\n', ' ', t)
-                if t:
-                    whole_parts.append(t)
-            sections.append({"title": "", "level": 1, "text": " ".join(whole_parts).strip()})
-            return sections
-
-        for h in headings:
-            try:
-                h_level = int(h.name[1])
-            except:
-                h_level = 2
-            headline = h.get_text(strip=True)
-            text = self._collect_text_for_heading(h, h_level)
-            sections.append({"title": headline, "level": h_level, "text": text})
-        return sections
+        return self.parser.parse_sections_by_headings(html)
 
     def scrape_article_sections(self, url):
         html = self.fetch_html(url)
@@ -169,8 +94,94 @@ class Crawler:
         #     logger.info(f"{i}. {s['title'] or 'Lead'}  (len text: {len(s['text'])})")
         return sections
 
+    def _remove_temp_dirs(self):
+        for path in self.temp_dirs:
+            shutil.rmtree(path, ignore_errors=True)
+
     def close(self):
         try:
             self.driver.quit()
         except Exception:
             pass
+        finally:
+            self._remove_temp_dirs()
+
+
+class FetchResult(NamedTuple):
+    html: str | None
+    strategy: str
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class HttpFetcher:
+    def __init__(self, pool_size: int = 10, timeout: float = 10.0, user_agent: str = "rag-flow-crawler/1.0"):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": user_agent, "Accept": "text/html"})
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, url, validators: dict | None = None) -> FetchResult | None:
+        validators = validators or {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return FetchResult(None, "not_modified", validators.get("etag"), validators.get("last_modified"))
+        if response.status_code != 200:
+            return None
+        html = response.text
+        if 'id="mw-content-text"' not in html or not CONTENT_MARKER_RE.search(html):
+            return None
+        return FetchResult(html, "http", response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+    def close(self):
+        self.session.close()
+
+
+class PageFetcher:
+    def __init__(self, http: HttpFetcher, browser_pool, history_size: int = 1000):
+        self.http = http
+        self.browser_pool = browser_pool
+        self.history_size = history_size
+        self.strategies: OrderedDict[str, str] = OrderedDict()
+        self._counts = {"http": 0, "not_modified": 0, "browser": 0, "http_errors": 0}
+        self._lock = threading.Lock()
+
+    def _record(self, url, strategy):
+        with self._lock:
+            self._counts[strategy] += 1
+            self.strategies[url] = strategy
+            self.strategies.move_to_end(url)
+            while len(self.strategies) > self.history_size:
+                self.strategies.popitem(last=False)
+
+    def fetch(self, url, validators: dict | None = None) -> FetchResult:
+        result = None
+        try:
+            result = self.http.fetch(url, validators)
+        except requests.RequestException as e:
+            logger.info(f"HTTP fetch failed for {url}, falling back to browser: {e}")
+            with self._lock:
+                self._counts["http_errors"] += 1
+
+        if result is None:
+            with self.browser_pool.lease() as crawler:
+                result = FetchResult(crawler.fetch_html(url), "browser")
+
+        self._record(url, result.strategy)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
@@ -0,0 +1,166 @@
+import re
+import math
+import time
+import hashlib
+import threading
+from typing import NamedTuple
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from loguru import logger
+from crawlers.parser import section_parser
+
+DEFAULT_EXCLUDE = (
+    r"[?&](action|oldid|diff|printable|curid)=",
+    r"/wiki/(Special|Specjalna|Talk|Dyskusja|File|Plik|Category|Kategoria|Template|Szablon|Help|Pomoc|Portal|Wikipedia|User|Wikipedysta):",
+)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class HostRateLimiter:
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        self._next_slot: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class FetchedPage(NamedTuple):
+    url: str
+    html: str | None
+    strategy: str
+    depth: int
+    seconds: float
+    etag: str | None = None
+    last_modified: str | None = None
+    links: list[str] | None = None
+
+
+class SiteCrawler:
+    def __init__(
+        self,
+        fetcher,
+        max_depth: int = 0,
+        max_pages: int = 100,
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = DEFAULT_EXCLUDE,
+        same_host: bool = True,
+        concurrency: int = 4,
+        host_delay: float = 1.0,
+        bloom: bool | None = None,
+        validators: Callable[[str], dict | None] | None = None,
+    ):
+        self.fetcher = fetcher
+        self.validators = validators
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.include = [re.compile(p) for p in include]
+        self.exclude = [re.compile(p) for p in exclude]
+        self.same_host = same_host
+        self.concurrency = concurrency
+        self.rate_limiter = HostRateLimiter(host_delay)
+        if bloom is None:
+            bloom = max_pages > 10000
+        self.seen = BloomFilter(max_pages * 20) if bloom else set()
+        self.failed: list[str] = []
+
+    def _allowed(self, url: str, hosts: set[str]) -> bool:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return False
+        if self.same_host and parts.netloc not in hosts:
+            return False
+        if self.include and not any(p.search(url) for p in self.include):
+            return False
+        return not any(p.search(url) for p in self.exclude)
+
+    def extract_links(self, base_url: str, html: str) -> list[str]:
+        return [normalize_url(urljoin(base_url, href)) for href in section_parser.extract_links(html)]
+
+    def _fetch(self, url: str, depth: int) -> FetchedPage:
+        self.rate_limiter.wait(urlsplit(url).netloc)
+        validators = self.validators(url) if self.validators else None
+        start = time.perf_counter()
+        result = self.fetcher.fetch(url, validators)
+        stored_links = (validators or {}).get("links")
+        if result.html is None and stored_links is None and depth < self.max_depth:
+            result = self.fetcher.fetch(url, None)
+        links = stored_links if result.html is None else self.extract_links(url, result.html)
+        return FetchedPage(url, result.html, result.strategy, depth, time.perf_counter() - start, result.etag, result.last_modified, links)
+
+    def crawl(self, seeds: Iterable[str]) -> Iterator[FetchedPage]:
+        seeds = [normalize_url(url) for url in seeds]
+        hosts = {urlsplit(url).netloc for url in seeds}
+        scheduled = 0
+        pending = {}
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="frontier")
+
+        def schedule(url: str, depth: int):
+            nonlocal scheduled
+            if scheduled >= self.max_pages or url in self.seen:
+                return
+            self.seen.add(url)
+            scheduled += 1
+            pending[executor.submit(self._fetch, url, depth)] = url
+
+        try:
+            for url in seeds:
+                schedule(url, 0)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = pending.pop(future)
+                    try:
+                        page = future.result()
+                    except Exception as e:
+                        logger.warning(f"Failed to fetch {url}: {e}")
+                        self.failed.append(url)
+                        continue
+
+                    if page.links and page.depth < self.max_depth:
+                        for link in page.links:
+                            if self._allowed(link, hosts):
+                                schedule(link, page.depth + 1)
+                    yield page
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+__all__ = ["SiteCrawler", "FetchedPage", "BloomFilter", "HostRateLimiter", "normalize_url"]
@@ -0,0 +1,100 @@
+import os
+import re
+from bs4 import BeautifulSoup, Tag
+
+IGNORED_CLASSES = frozenset(("infobox", "navbox", "vertical-navbox", "toc", "metadata"))
+IGNORED_TAGS = frozenset(("nav", "header", "footer"))
+TEXT_TAGS = frozenset(("p", "li", "dd", "dt"))
+HEADING_LEVELS = {f"h{level}": level for level in range(1, 7)}
+REFERENCE_RE = re.compile(r'\[\s*\d+\s*\]')
+
+def _default_features() -> str:
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+class SectionParser:
+    def __init__(self, features: str | None = None):
+        self.features = features or _default_features()
+
+    @staticmethod
+    def _is_ignored(tag: Tag) -> bool:
+        return tag.name in IGNORED_TAGS or not IGNORED_CLASSES.isdisjoint(tag.get("class") or ())
+
+    def _content_stack(self, content: Tag) -> list[Tag]:
+        if self._is_ignored(content) or any(self._is_ignored(anc) for anc in content.parents if isinstance(anc, Tag)):
+            return []
+        return [ch for ch in reversed(content.contents) if isinstance(ch, Tag)]
+
+    @staticmethod
+    def _clean(text: str) -> str:
+        return REFERENCE_RE.sub('', text).replace('\n', ' ')
+
+    def parse_sections_by_headings(self, html):
+        soup = BeautifulSoup(html, self.features)
+        content = soup.select_one("div#mw-content-text .mw-parser-output") or soup.select_one("#mw-content-text")
+        if not content:
+            raise RuntimeError("Nie znaleziono kontenera artykułu")
+
+        lead_parts = []
+        sections = []
+        open_sections: list[tuple[int, list[str]]] = []
+
+        stack = self._content_stack(content)
+        while stack:
+            el = stack.pop()
+            if self._is_ignored(el):
+                continue
+
+            level = HEADING_LEVELS.get(el.name)
+            if level is not None:
+                while open_sections and open_sections[-1][0] >= level:
+                    open_sections.pop()
+                parts = []
+                sections.append({"title": el.get_text(strip=True), "level": level, "parts": parts})
+                open_sections.append((level, parts))
+                continue
+
+            if el.name in TEXT_TAGS:
+                t = self._clean(el.get_text(" ", strip=True))
+                if t:
+                    if open_sections:
+                        for _, parts in open_sections:
+                            parts.append(t)
+                    else:
+                        lead_parts.append(t)
+
+            stack.extend(ch for ch in reversed(el.contents) if isinstance(ch, Tag))
+
+        lead = {"title": "", "level": 1, "text": " ".join(lead_parts).strip()}
+        return [lead] + [
+            {"title": s["title"], "level": s["level"], "text": " ".join(s["parts"]).strip()}
+            for s in sections
+        ]
+
+    def extract_links(self, html) -> list[str]:
+        soup = BeautifulSoup(html, self.features)
+        content = soup.select_one("#mw-content-text") or soup.body or soup
+        links = []
+        stack = self._content_stack(content)
+        while stack:
+            el = stack.pop()
+            if self._is_ignored(el):
+                continue
+            if el.name == "a" and el.get("href"):
+                links.append(el["href"])
+            stack.extend(ch for ch in reversed(el.contents) if isinstance(ch, Tag))
+        return links
+
+    def extract_sections(self, html, url):
+        sections = [
+            {"page_url": url, "title": s["title"], "text": s["text"], "level": s.get("level")}
+            for s in self.parse_sections_by_headings(html)
+        ]
+        return [s for s in sections if s.get('text') and s.get('title') is not None]
+
+
+section_parser = SectionParser(os.getenv("CRAWLER_HTML_PARSER") or None)
@@ -1,10 +1,222 @@
+import json
+import time
+import struct
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from itertools import islice
+
+import numpy as np
+
 import pymysql
 import psycopg
-from contextlib import contextmanager
+from psycopg_pool import ConnectionPool
+from loguru import logger
+
+from mysql_dialect import MySQLVectorDialect
+
+
+class MySQLConnectionPool:
+    def __init__(self, config: dict, min_size: int = 1, max_size: int = 10, max_idle: float = 600.0, timeout: float = 30.0):
+        self.config = config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+
+        self._idle: deque[tuple[object, float]] = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "connections_num": 0,
+            "requests_num": 0,
+            "requests_waiting": 0,
+            "requests_wait_ms": 0,
+            "connections_lost": 0,
+            "connections_closed_idle": 0,
+        }
+
+        threading.Thread(target=self._fill, name="mysql-pool-fill", daemon=True).start()
+
+    def _fill(self):
+        for _ in range(self.min_size):
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._new_connection()
+            except Exception as e:
+                logger.warning(f"MySQL pool could not open a connection, starting empty: {e}")
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                return
+            self._checkin(conn)
+
+    def _new_connection(self):
+        conn = pymysql.connect(**self.config, cursorclass=pymysql.cursors.DictCursor)
+        with self._cond:
+            self._stats["connections_num"] += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn) -> bool:
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _reserve(self, start: float) -> tuple[object, str, bool]:
+        waited = False
+        with self._cond:
+            while True:
+                while self._idle:
+                    conn, released_at = self._idle.pop()
+                    if time.monotonic() - released_at > self.max_idle and self._size > self.min_size:
+                        self._stats["connections_closed_idle"] += 1
+                        self._size -= 1
+                        return conn, "close", waited
+                    return conn, "check", waited
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, "open", waited
+
+                waited = True
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise TimeoutError(f"Couldn't get a connection after {self.timeout} sec")
+
+    def _checkout(self):
+        start = time.monotonic()
+        waited = False
+        with self._cond:
+            self._stats["requests_num"] += 1
+        while True:
+            conn, action, reserve_waited = self._reserve(start)
+            waited = waited or reserve_waited
+            if action == "close":
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                continue
+            if action == "check":
+                if not self._is_healthy(conn):
+                    with self._cond:
+                        self._stats["connections_lost"] += 1
+                    self._discard(conn)
+                    continue
+            else:
+                try:
+                    conn = self._new_connection()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            if waited:
+                with self._cond:
+                    self._stats["requests_waiting"] += 1
+                    self._stats["requests_wait_ms"] += int((time.monotonic() - start) * 1000)
+            return conn
+
+    def _checkin(self, conn):
+        try:
+            conn.rollback()
+        except Exception:
+            with self._cond:
+                self._stats["connections_lost"] += 1
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._checkin(conn)
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                **self._stats,
+                "pool_min": self.min_size,
+                "pool_max": self.max_size,
+                "pool_size": self._size,
+                "pool_available": len(self._idle),
+            }
+
+    def close(self):
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._discard(conn)
+
 
 class Database:
-    def __init__(self, db_type, host, port, user, password, db_name):
+    METRIC_OPERATORS = {
+        "cosine": "<=>",
+        "l2": "<->",
+        "inner_product": "<#>"
+    }
+    DOCUMENT_COLUMNS = ("title", "content", "page_url", "content_hash", "section_index", "chunk_index", "embedding")
+    INTEGER_COLUMNS = frozenset(("id", "section_index", "chunk_index"))
+    ROW_COLUMNS = ("id", "title", "content", "page_url", "content_hash", "section_index", "chunk_index")
+    COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+    COPY_BINARY_TRAILER = struct.pack("!h", -1)
+    INDEX_OPERATOR_CLASSES = {
+        "cosine": "vector_cosine_ops",
+        "l2": "vector_l2_ops",
+        "inner_product": "vector_ip_ops"
+    }
+    HALFVEC_OPERATOR_CLASSES = {
+        "cosine": "halfvec_cosine_ops",
+        "l2": "halfvec_l2_ops",
+        "inner_product": "halfvec_ip_ops"
+    }
+    INDEX_METHODS = ("hnsw", "ivfflat")
+    QUANTIZATION_MODES = ("none", "halfvec", "binary")
+    COLLECTION_FIELDS = ("name", "model", "dim", "metric", "quantization", "index_params")
+
+    def __init__(
+        self,
+        db_type,
+        host,
+        port,
+        user,
+        password,
+        db_name,
+        pool: bool = False,
+        pool_min_size: int = 1,
+        pool_max_size: int = 10,
+        pool_max_idle: float = 600.0,
+        pool_timeout: float = 30.0,
+        text_search_config: str = "simple",
+        mysql_candidate_factor: int = 20,
+        rescore_factor: int = 4,
+    ):
         self.db_type = db_type
+        self.text_search_config = text_search_config
+        self.rescore_factor = rescore_factor
+        self._storage: dict[str, tuple[str, int | None]] = {}
+        self._registry_ready = False
+        self.dialect = MySQLVectorDialect(self, candidate_factor=mysql_candidate_factor) if db_type == "mysql" else None
         if db_type == "postgres":
             self.config = dict(host=host, port=port, user=user, password=password, dbname=db_name)
         elif db_type == "mysql":
@@ -12,8 +224,36 @@ class Database:
         else:
             raise ValueError("Unsupported db_type")
 
+        self._ready_tables: set[str] = set()
+        self.pool = None
+        if pool:
+            if db_type == "postgres":
+                self.pool = ConnectionPool(
+                    conninfo="",
+                    kwargs=self.config,
+                    min_size=pool_min_size,
+                    max_size=pool_max_size,
+                    max_idle=pool_max_idle,
+                    timeout=pool_timeout,
+                    check=ConnectionPool.check_connection,
+                    open=True,
+                )
+            else:
+                self.pool = MySQLConnectionPool(
+                    self.config,
+                    min_size=pool_min_size,
+                    max_size=pool_max_size,
+                    max_idle=pool_max_idle,
+                    timeout=pool_timeout,
+                )
+
     @contextmanager
     def connect(self):
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+            return
+
         if self.db_type == "postgres":
             conn = psycopg.connect(**self.config)
         elif self.db_type == "mysql":
@@ -25,6 +265,15 @@ class Database:
         finally:
             conn.close()
 
+    def pool_stats(self) -> dict | None:
+        if self.pool is None:
+            return None
+        return self.pool.get_stats()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
     def add_document(self, table: str, title: list[str], content: list[str], page_url: list[str], embedding: list[list[float]]):
         with self.connect() as conn:
             with conn.cursor() as cur:
@@ -34,59 +283,580 @@ class Database:
                 cur.execute(query, (title, content, page_url, embedding))
                 conn.commit()
 
-    def add_documents(self, table: str, titles: list[str], contents: list[str], page_urls: list[str], embeddings: list[list[float]]):
+    def _insert_rows(self, table: str, rows: list[dict]):
+        if self.dialect is not None:
+            return self.dialect.insert_rows(table, rows)
+        document_columns = ("id", *self.DOCUMENT_COLUMNS) if rows and "id" in rows[0] else self.DOCUMENT_COLUMNS
+        columns = ", ".join(document_columns)
+        placeholders = ", ".join(["%s"] * len(document_columns))
+        data_tuples = []
+        for row in rows:
+            embedding = row.get("embedding")
+            if hasattr(embedding, "tolist"):
+                embedding = embedding.tolist()
+            data_tuples.append(tuple(embedding if c == "embedding" else row.get(c) for c in document_columns))
+
         with self.connect() as conn:
             with conn.cursor() as cur:
                 query = f"""
-                INSERT INTO {table} (title, content, page_url, embedding) VALUES (%s, %s, %s, %s)
+                INSERT INTO {table} ({columns}) VALUES ({placeholders})
                 """
-                data_tuples = []
-                for title, content, page_url, embedding in zip(titles, contents, page_urls, embeddings):
-                    data_tuples.append((title, content, page_url, embedding))
-                
                 cur.executemany(query, data_tuples)
                 conn.commit()
 
+    def add_documents(self, table: str, titles: list[str], contents: list[str], page_urls: list[str], embeddings, content_hashes: list[str] | None = None):
+        content_hashes = content_hashes or [None] * len(contents)
+        self._insert_rows(table, [
+            {"title": title, "content": content, "page_url": page_url, "embedding": embedding, "content_hash": content_hash}
+            for title, content, page_url, embedding, content_hash in zip(titles, contents, page_urls, embeddings, content_hashes)
+        ])
+
+    @staticmethod
+    def _copy_text_field(value) -> bytes:
+        if value is None:
+            return struct.pack("!i", -1)
+        data = str(value).encode("utf-8")
+        return struct.pack("!i", len(data)) + data
+
+    @staticmethod
+    def _copy_vector_field(vector) -> bytes:
+        values = np.asarray(vector, dtype=">f4")
+        payload = struct.pack("!hh", len(values), 0) + values.tobytes()
+        return struct.pack("!i", len(payload)) + payload
+
+    @staticmethod
+    def _copy_int_field(value) -> bytes:
+        if value is None:
+            return struct.pack("!i", -1)
+        return struct.pack("!ii", 4, int(value))
+
+    def _copy_binary_row(self, row: dict, columns: tuple[str, ...]) -> bytes:
+        fields = []
+        for column in columns:
+            if column == "embedding":
+                fields.append(self._copy_vector_field(row["embedding"]))
+            elif column in self.INTEGER_COLUMNS:
+                fields.append(self._copy_int_field(row.get(column)))
+            else:
+                fields.append(self._copy_text_field(row.get(column)))
+        return struct.pack("!h", len(fields)) + b"".join(fields)
+
+    def bulk_add_documents(self, table: str, rows: Iterable[dict], chunk_size: int = 1000) -> dict:
+        rows = iter(rows)
+        total = 0
+        start = time.perf_counter()
+
+        if self.db_type == "postgres":
+            with self.connect() as conn:
+                while chunk := list(islice(rows, chunk_size)):
+                    with conn.cursor() as cur:
+                        self._copy_rows(cur, table, chunk)
+                    conn.commit()
+                    total += len(chunk)
+        else:
+            while chunk := list(islice(rows, chunk_size)):
+                self._insert_rows(table, chunk)
+                total += len(chunk)
+
+        elapsed = time.perf_counter() - start
+        return {
+            "rows": total,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(total / elapsed, 1) if elapsed else None,
+        }
+
+    def _copy_rows(self, cur, table: str, rows: list[dict]):
+        columns = ("id", *self.DOCUMENT_COLUMNS) if "id" in rows[0] else self.DOCUMENT_COLUMNS
+        with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN (FORMAT BINARY)") as copy:
+            copy.write(self.COPY_BINARY_HEADER)
+            for row in rows:
+                copy.write(self._copy_binary_row(row, columns))
+            copy.write(self.COPY_BINARY_TRAILER)
+
+    def fetch_rows(self, table: str, after_id: int = 0, limit: int = 1000) -> list[dict]:
+        if self.dialect is not None:
+            return self.dialect.fetch_rows(table, after_id, limit)
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT {', '.join(self.ROW_COLUMNS)} FROM {table} WHERE id > %s ORDER BY id LIMIT %s",
+                    (after_id, limit),
+                )
+                return [dict(zip(self.ROW_COLUMNS, row)) for row in cur.fetchall()]
+
+    def count_rows(self, table: str) -> int:
+        if self.dialect is not None:
+            return self.dialect.count_rows(table)
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT count(*) FROM {table}")
+                return cur.fetchone()[0]
+
+    def remove_documents(self, table: str, doc_ids: list[int]):
+        if not doc_ids:
+            return
+        if self.dialect is not None:
+            return self.dialect.remove_documents(table, doc_ids)
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"DELETE FROM {table} WHERE id = ANY(%s)", (list(doc_ids),))
+                conn.commit()
+
+    @staticmethod
+    def pages_table(table: str) -> str:
+        return f"{table}_pages"
+
+    def get_page_validators(self, table: str, page_url: str) -> dict | None:
+        if self.dialect is not None:
+            return self.dialect.get_page_validators(table, page_url)
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT etag, last_modified, links FROM {self.pages_table(table)} WHERE page_url = %s",
+                    (page_url,),
+                )
+                row = cur.fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "links": json.loads(row[2]) if row[2] else None}
+
+    def save_page_validators(
+        self,
+        table: str,
+        page_url: str,
+        etag: str | None,
+        last_modified: str | None,
+        links: list[str] | None = None,
+    ):
+        if self.dialect is not None:
+            return self.dialect.save_page_validators(table, page_url, etag, last_modified, links)
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    INSERT INTO {self.pages_table(table)} (page_url, etag, last_modified, links, fetched_at)
+                    VALUES (%s, %s, %s, %s, now())
+                    ON CONFLICT (page_url) DO UPDATE
+                    SET etag = EXCLUDED.etag, last_modified = EXCLUDED.last_modified,
+                        links = coalesce(EXCLUDED.links, {self.pages_table(table)}.links), fetched_at = EXCLUDED.fetched_at
+                    """,
+                    (page_url, etag, last_modified, json.dumps(links) if links is not None else None),
+                )
+                conn.commit()
+
+    def get_section_hashes(self, table: str, page_url: str) -> dict[str, list[int]]:
+        if self.dialect is not None:
+            return self.dialect.get_section_hashes(table, page_url)
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT id, content_hash FROM {table} WHERE page_url = %s ORDER BY id", (page_url,))
+                hashes: dict[str, list[int]] = {}
+                for doc_id, content_hash in cur.fetchall():
+                    hashes.setdefault(content_hash, []).append(doc_id)
+                return hashes
+
     def remove_document(self, table: str, doc_id):
+        if self.dialect is not None:
+            return self.dialect.remove_documents(table, [doc_id])
         with self.connect() as conn:
             with conn.cursor() as cur:
                 query = f"DELETE FROM {table} WHERE id = %s"
                 cur.execute(query, (doc_id,))
                 conn.commit()
 
-    def search(self, table: str, query_vector, metric: str = "cosine", limit=5):
+    def search(self, table: str, query_vector, metric: str = "cosine", limit=5, ef_search: int | None = None, probes: int | None = None):
+        if self.dialect is not None:
+            return self.dialect.search(table, query_vector, metric=metric, limit=limit)
         with self.connect() as conn:
+            source, placeholders, candidates = self._candidate_source(conn, table, metric, limit, "%s::vector")
             with conn.cursor() as cur:
+                self._apply_search_params(cur, max(ef_search or 0, candidates) or None, probes)
                 if hasattr(query_vector, "tolist"):
                     query_vector = query_vector.tolist()
                 
-                metric_operators = {
-                    "cosine": "<=>",
-                    "l2": "<->", 
-                    "inner_product": "<#>"
-                }
-                
-                operator = metric_operators.get(metric, "<=>")
-                
-                if metric == "cosine":
-                    similarity_calc = f"ROUND(((1 - (embedding {operator} %s::vector)) * 100)::numeric, 2) as similarity_percent"
-                elif metric == "l2":
-                    similarity_calc = f"ROUND((embedding {operator} %s::vector)::numeric, 4) as l2_distance"
-                elif metric == "inner_product":
-                    similarity_calc = f"ROUND((embedding {operator} %s::vector)::numeric, 4) as inner_product_score"
-                else:
-                    similarity_calc = f"ROUND(((1 - (embedding {operator} %s::vector)) * 100)::numeric, 2) as similarity_percent"
-                
+                operator = self.METRIC_OPERATORS.get(metric, "<=>")
+                similarity_calc = self._score_sql(metric, "embedding", "%s::vector")
+
                 query = f"""
                 SELECT id, title, content, {similarity_calc}
-                FROM {table}
+                FROM {source}
                 ORDER BY embedding {operator} %s::vector
                 LIMIT %s
                 """
-                cur.execute(query, (query_vector, query_vector, limit))
+                cur.execute(query, (query_vector, *[query_vector] * placeholders, query_vector, limit))
                 return cur.fetchall()
 
+    def _score_sql(self, metric: str, column: str, vector: str) -> str:
+        operator = self.METRIC_OPERATORS.get(metric, "<=>")
+        if metric == "l2":
+            return f"ROUND(({column} {operator} {vector})::numeric, 4) as l2_distance"
+        if metric == "inner_product":
+            return f"ROUND(({column} {operator} {vector})::numeric, 4) as inner_product_score"
+        return f"ROUND(((1 - ({column} {operator} {vector})) * 100)::numeric, 2) as similarity_percent"
+
+    def _table_storage(self, conn, table: str) -> tuple[str, int | None]:
+        if table not in self._storage:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT
+                        CASE WHEN to_regclass('vector_tables') IS NULL THEN NULL
+                             ELSE (SELECT quantization FROM vector_tables WHERE name = %s) END,
+                        (SELECT atttypmod FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attname = 'embedding')
+                    """,
+                    (table, table),
+                )
+                mode, dim = cur.fetchone()
+            conn.commit()
+            self._storage[table] = (mode or "none", dim if dim and dim > 0 else None)
+        return self._storage[table]
+
+    def _first_stage(self, mode: str, dim: int, metric: str, query: str) -> str:
+        if mode == "halfvec":
+            return f"embedding::halfvec({dim}) {self.METRIC_OPERATORS.get(metric, '<=>')} ({query})::halfvec({dim})"
+        return f"binary_quantize(embedding)::bit({dim}) <~> binary_quantize({query})"
+
+    def _candidate_source(self, conn, table: str, metric: str, limit: int, query: str) -> tuple[str, int, int]:
+        mode, dim = self._table_storage(conn, table)
+        if mode == "none" or dim is None:
+            return table, 0, 0
+        candidates = max(int(limit) * self.rescore_factor, 40)
+        source = f"""(
+            SELECT id, title, content, embedding FROM {table}
+            ORDER BY {self._first_stage(mode, dim, metric, query)}
+            LIMIT {candidates}
+        ) candidates"""
+        return source, source.count("%s"), candidates
+
+    @staticmethod
+    def _vector_literal(vector) -> str:
+        if hasattr(vector, "tolist"):
+            vector = vector.tolist()
+        return "[" + ",".join(map(str, vector)) + "]"
+
+    def search_many(
+        self,
+        table: str,
+        query_vectors,
+        metric: str = "cosine",
+        limit=5,
+        fuse: bool = False,
+        ef_search: int | None = None,
+        probes: int | None = None,
+    ):
+        if self.dialect is not None:
+            return self.dialect.search_many(table, query_vectors, metric=metric, limit=limit, fuse=fuse)
+        with self.connect() as conn:
+            source, _, candidates = self._candidate_source(conn, table, metric, limit, "q.vec")
+            operator = self.METRIC_OPERATORS.get(metric, "<=>")
+            if metric in ("l2", "inner_product"):
+                score = f"ROUND((embedding {operator} q.vec)::numeric, 4)"
+            else:
+                score = f"ROUND(((1 - (embedding {operator} q.vec)) * 100)::numeric, 2)"
+
+            hits = f"""
+            SELECT q.idx, d.id, d.title, d.content, d.score, d.distance
+            FROM unnest(%s::vector[]) WITH ORDINALITY AS q(vec, idx)
+            CROSS JOIN LATERAL (
+                SELECT id, title, content, {score} AS score, embedding {operator} q.vec AS distance
+                FROM {source}
+                ORDER BY embedding {operator} q.vec
+                LIMIT %s
+            ) d
+            """
+            if fuse:
+                query = f"""
+                SELECT id, title, content, score FROM (
+                    SELECT DISTINCT ON (id) id, title, content, score, distance
+                    FROM ({hits}) hits
+                    ORDER BY id, distance
+                ) fused
+                ORDER BY distance
+                """
+            else:
+                query = f"{hits} ORDER BY q.idx, d.distance"
+
+            vectors = [self._vector_literal(v) for v in query_vectors]
+            with conn.cursor() as cur:
+                self._apply_search_params(cur, max(ef_search or 0, candidates) or None, probes)
+                cur.execute(query, (vectors, limit))
+                rows = cur.fetchall()
+
+        if fuse:
+            return rows
+        per_query = [[] for _ in vectors]
+        for idx, doc_id, title, content, score, _ in rows:
+            per_query[idx - 1].append((doc_id, title, content, score))
+        return per_query
+
+    def hybrid_search(
+        self,
+        table: str,
+        query_text: str,
+        query_vector,
+        metric: str = "cosine",
+        limit=5,
+        candidates=20,
+        rrf_k=60,
+        ef_search: int | None = None,
+        probes: int | None = None,
+    ):
+        operator = self.METRIC_OPERATORS.get(metric, "<=>")
+        with self.connect() as conn:
+            source, _, first_stage = self._candidate_source(conn, table, metric, candidates, "%(vec)s::vector")
+            query = f"""
+            WITH q AS (
+                SELECT replace(plainto_tsquery(%(config)s::regconfig, %(text)s)::text, '&', '|')::tsquery AS ts
+            ),
+            vector_hits AS (
+                SELECT id, row_number() OVER (ORDER BY distance) AS rank
+                FROM (
+                    SELECT id, embedding {operator} %(vec)s::vector AS distance
+                    FROM {source}
+                    ORDER BY embedding {operator} %(vec)s::vector
+                    LIMIT %(candidates)s
+                ) v
+            ),
+            lexical_hits AS (
+                SELECT id, row_number() OVER (ORDER BY lexical_rank DESC) AS rank
+                FROM (
+                    SELECT id, ts_rank_cd(content_tsv, q.ts, 32) AS lexical_rank
+                    FROM {table}, q
+                    WHERE q.ts <> ''::tsquery AND content_tsv @@ q.ts
+                    ORDER BY lexical_rank DESC
+                    LIMIT %(candidates)s
+                ) l
+            ),
+            fused AS (
+                SELECT id, sum(1.0 / (%(rrf_k)s + rank)) AS rrf
+                FROM (SELECT * FROM vector_hits UNION ALL SELECT * FROM lexical_hits) hits
+                GROUP BY id
+            )
+            SELECT d.id, d.title, d.content, {self._score_sql(metric, "d.embedding", "%(vec)s::vector")}
+            FROM fused f
+            JOIN {table} d USING (id)
+            ORDER BY f.rrf DESC
+            LIMIT %(limit)s
+            """
+            params = {
+                "vec": self._vector_literal(query_vector),
+                "config": self.text_search_config,
+                "text": query_text,
+                "candidates": candidates,
+                "rrf_k": rrf_k,
+                "limit": limit,
+            }
+            with conn.cursor() as cur:
+                self._apply_search_params(cur, max(ef_search or 0, first_stage) or None, probes)
+                cur.execute(query, params)
+                return cur.fetchall()
+
+    @staticmethod
+    def _apply_search_params(cur, ef_search: int | None, probes: int | None):
+        if ef_search:
+            cur.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(int(ef_search)),))
+        if probes:
+            cur.execute("SELECT set_config('ivfflat.probes', %s, true)", (str(int(probes)),))
+
+    @staticmethod
+    def index_name(table: str, method: str, metric: str) -> str:
+        return f"{table}_embedding_{method}_{metric}_idx"
+
+    def _check_index(self, method: str, metric: str):
+        if self.dialect is not None:
+            raise ValueError("Vector index management is only available for PostgreSQL")
+        if method not in self.INDEX_METHODS:
+            raise ValueError(f"Unsupported index method: {method}")
+        if metric not in self.INDEX_OPERATOR_CLASSES:
+            raise ValueError(f"Unsupported metric: {metric}")
+
+    def create_index(
+        self,
+        table: str,
+        method: str = "hnsw",
+        metric: str = "cosine",
+        m: int = 16,
+        ef_construction: int = 64,
+        lists: int = 100,
+    ) -> dict:
+        self._check_index(method, metric)
+        if method == "hnsw":
+            options = {"m": int(m), "ef_construction": int(ef_construction)}
+        else:
+            options = {"lists": int(lists)}
+        params = ", ".join(f"{key} = {value}" for key, value in options.items())
+
+        name = self.index_name(table, method, metric)
+        query = f"""
+        CREATE INDEX IF NOT EXISTS {name} ON {table}
+        USING {method} (embedding {self.INDEX_OPERATOR_CLASSES[metric]})
+        WITH ({params})
+        """
+        start = time.perf_counter()
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query)
+                self._register_table(cur, table)
+                self._record_index(cur, table, name, {"method": method, "metric": metric, **options})
+                conn.commit()
+        return {"index": name, "build_seconds": round(time.perf_counter() - start, 3)}
+
+    def drop_index(self, table: str, method: str = "hnsw", metric: str = "cosine") -> dict:
+        self._check_index(method, metric)
+        name = self.index_name(table, method, metric)
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP INDEX IF EXISTS {name}")
+                self._register_table(cur, table)
+                self._record_index(cur, table, name, None)
+                conn.commit()
+        return {"index": name}
+
+    def rebuild_index(self, table: str, method: str = "hnsw", metric: str = "cosine") -> dict:
+        self._check_index(method, metric)
+        name = self.index_name(table, method, metric)
+        start = time.perf_counter()
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"REINDEX INDEX {name}")
+                conn.commit()
+        return {"index": name, "build_seconds": round(time.perf_counter() - start, 3)}
+
+    def list_indexes(self, table: str) -> list[dict]:
+        if self.dialect is not None:
+            return []
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT indexname, indexdef, pg_relation_size(quote_ident(indexname)::regclass)
+                    FROM pg_indexes WHERE tablename = %s
+                    """,
+                    (table,),
+                )
+                return [
+                    {"index": name, "definition": definition, "size_bytes": size}
+                    for name, definition, size in cur.fetchall()
+                ]
+
+    def set_quantization(self, table: str, mode: str, metric: str = "cosine", m: int = 16, ef_construction: int = 64) -> dict:
+        if self.dialect is not None:
+            raise ValueError("Quantized storage is only available for PostgreSQL")
+        if mode not in self.QUANTIZATION_MODES:
+            raise ValueError(f"Unsupported quantization: {mode} (expected one of {', '.join(self.QUANTIZATION_MODES)})")
+        if metric not in self.HALFVEC_OPERATOR_CLASSES:
+            raise ValueError(f"Unsupported metric: {metric}")
+
+        start = time.perf_counter()
+        with self.connect() as conn:
+            self._storage.pop(table, None)
+            previous, dim = self._table_storage(conn, table)
+            if dim is None:
+                raise ValueError(f"Table {table} has no fixed-dimension embedding column")
+
+            name = None
+            params = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+            if mode == "halfvec":
+                name = self.index_name(table, "hnsw_halfvec", metric)
+                expression = f"(embedding::halfvec({dim})) {self.HALFVEC_OPERATOR_CLASSES[metric]}"
+            elif mode == "binary":
+                name = self.index_name(table, "hnsw_binary", "hamming")
+                expression = f"(binary_quantize(embedding)::bit({dim})) bit_hamming_ops"
+
+            with conn.cursor() as cur:
+                self._register_table(cur, table)
+                cur.execute("SELECT index_params FROM vector_tables WHERE name = %s", (table,))
+                stale = {index for index, options in cur.fetchone()[0].items() if options.get("quantization")}
+                if previous == "halfvec":
+                    stale.update(self.index_name(table, "hnsw_halfvec", other) for other in self.HALFVEC_OPERATOR_CLASSES)
+                elif previous == "binary":
+                    stale.add(self.index_name(table, "hnsw_binary", "hamming"))
+                stale.discard(name)
+                for index in sorted(stale):
+                    cur.execute(f"DROP INDEX IF EXISTS {index}")
+                    self._record_index(cur, table, index, None)
+
+                if name is not None:
+                    cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING hnsw ({expression}) WITH ({params})")
+                self._register_table(cur, table, quantization=mode)
+                if name is not None:
+                    self._record_index(cur, table, name, {"method": "hnsw", "metric": metric, "quantization": mode, "m": int(m), "ef_construction": int(ef_construction)})
+                conn.commit()
+        self._storage.pop(table, None)
+        return {"quantization": mode, "index": name, "dropped": sorted(stale), "build_seconds": round(time.perf_counter() - start, 3)}
+
+    def storage_stats(self, table: str) -> dict:
+        if self.dialect is not None:
+            raise ValueError("Storage statistics are only available for PostgreSQL")
+        with self.connect() as conn:
+            mode, dim = self._table_storage(conn, table)
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT count(*), pg_table_size(%s::regclass) FROM {table}", (table,))
+                rows, table_bytes = cur.fetchone()
+        return {
+            "quantization": mode,
+            "dim": dim,
+            "rows": rows,
+            "table_bytes": table_bytes,
+            "indexes": {index["index"]: index["size_bytes"] for index in self.list_indexes(table)},
+        }
+
+    def evaluate_recall(
+        self,
+        table: str,
+        metric: str = "cosine",
+        k: int = 10,
+        sample_size: int = 50,
+        ef_search: int | None = None,
+        probes: int | None = None,
+    ) -> dict:
+        if self.dialect is not None:
+            return self.dialect.evaluate_recall(table, metric=metric, k=k, sample_size=sample_size)
+        operator = self.METRIC_OPERATORS.get(metric, "<=>")
+        knn = f"SELECT id FROM {table} ORDER BY embedding {operator} %s::vector LIMIT %s"
+
+        with self.connect() as conn:
+            source, placeholders, candidates = self._candidate_source(conn, table, metric, k, "%s::vector")
+            approx_knn = f"SELECT id FROM {source} ORDER BY embedding {operator} %s::vector LIMIT %s"
+            ef_search = max(ef_search or 0, candidates) or None
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT embedding::text FROM {table} ORDER BY random() LIMIT %s", (sample_size,))
+                samples = [row[0] for row in cur.fetchall()]
+            conn.commit()
+
+            approx_seconds = exact_seconds = 0.0
+            recalls = []
+            for vector in samples:
+                with conn.cursor() as cur:
+                    self._apply_search_params(cur, ef_search, probes)
+                    start = time.perf_counter()
+                    cur.execute(approx_knn, (*[vector] * placeholders, vector, k))
+                    approx = {row[0] for row in cur.fetchall()}
+                    approx_seconds += time.perf_counter() - start
+
+                    cur.execute("SELECT set_config('enable_indexscan', 'off', true)")
+                    start = time.perf_counter()
+                    cur.execute(knn, (vector, k))
+                    exact = {row[0] for row in cur.fetchall()}
+                    exact_seconds += time.perf_counter() - start
+                conn.commit()
+                if exact:
+                    recalls.append(len(approx & exact) / len(exact))
+
+        n = len(samples) or 1
+        return {
+            "k": k,
+            "samples": len(samples),
+            "recall": round(sum(recalls) / len(recalls), 4) if recalls else None,
+            "approx_ms_per_query": round(approx_seconds / n * 1000, 3),
+            "exact_ms_per_query": round(exact_seconds / n * 1000, 3),
+        }
+
     def create_vector_table(self, table, dim=384):
+        if self.dialect is not None:
+            self.dialect.create_vector_table(table, dim)
+            self._ready_tables.add(table)
+            return
         with self.connect() as conn:
             with conn.cursor() as cur:
                 query = f"""
@@ -95,11 +865,189 @@ class Database:
                     title TEXT,
                     content TEXT,
                     page_url TEXT NULL,
+                    content_hash TEXT NULL,
+                    section_index INTEGER NULL,
+                    chunk_index INTEGER NULL,
                     embedding vector({dim})
                 )
                 """
                 cur.execute(query)
+                cur.execute(f"""
+                ALTER TABLE {table}
+                    ADD COLUMN IF NOT EXISTS content_hash TEXT NULL,
+                    ADD COLUMN IF NOT EXISTS section_index INTEGER NULL,
+                    ADD COLUMN IF NOT EXISTS chunk_index INTEGER NULL
+                """)
+                cur.execute(f"CREATE INDEX IF NOT EXISTS {table}_page_url_idx ON {table} (page_url)")
+                self._register_table(cur, table)
+                cur.execute(f"""
+                ALTER TABLE {table}
+                    ADD COLUMN IF NOT EXISTS content_tsv tsvector GENERATED ALWAYS AS (
+                        to_tsvector('{self.text_search_config}'::regconfig, coalesce(title, '') || ' ' || coalesce(content, ''))
+                    ) STORED
+                """)
+                cur.execute(f"CREATE INDEX IF NOT EXISTS {table}_content_tsv_idx ON {table} USING gin (content_tsv)")
+                cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.pages_table(table)} (
+                    page_url TEXT PRIMARY KEY,
+                    etag TEXT NULL,
+                    last_modified TEXT NULL,
+                    links TEXT NULL,
+                    fetched_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+                """)
+                cur.execute(f"ALTER TABLE {self.pages_table(table)} ADD COLUMN IF NOT EXISTS links TEXT NULL")
                 conn.commit()
+        self._ready_tables.add(table)
+
+    def ensure_vector_table(self, table, dim=384):
+        if table not in self._ready_tables:
+            self.create_vector_table(table, dim)
+
+    def drop_table(self, table):
+        if self.dialect is not None:
+            self.dialect.drop_table(table)
+        else:
+            with self.connect() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(f"DROP TABLE IF EXISTS {table}, {self.pages_table(table)}")
+                    if self._relation_exists(cur, "vector_tables"):
+                        cur.execute("DELETE FROM vector_tables WHERE name = %s", (table,))
+                    conn.commit()
+        self._ready_tables.discard(table)
+        self._storage.pop(table, None)
+
+    def replace_table(
+        self,
+        table: str,
+        shadow: str,
+        fill: Callable[[list[dict]], list[dict]],
+        model: str,
+        dim: int,
+        metric: str = "cosine",
+    ) -> dict:
+        if self.dialect is not None:
+            result = self.dialect.replace_table(table, shadow, fill, model, dim, metric)
+        else:
+            with self.connect() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+                    cur.execute(f"DELETE FROM {shadow} s WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.id = s.id)")
+                    removed = cur.rowcount
+                    cur.execute(
+                        f"""
+                        SELECT {', '.join('t.' + column for column in self.ROW_COLUMNS)} FROM {table} t
+                        WHERE NOT EXISTS (SELECT 1 FROM {shadow} s WHERE s.id = t.id) ORDER BY t.id
+                        """
+                    )
+                    missing = [dict(zip(self.ROW_COLUMNS, row)) for row in cur.fetchall()]
+                    if missing:
+                        self._copy_rows(cur, shadow, fill(missing))
+
+                    cur.execute(f"DROP TABLE {table}, {self.pages_table(shadow)}")
+                    cur.execute(f"ALTER TABLE {shadow} RENAME TO {table}")
+                    cur.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", (table,))
+                    for (name,) in cur.fetchall():
+                        if name.startswith(shadow):
+                            cur.execute(f"ALTER INDEX {name} RENAME TO {table}{name[len(shadow):]}")
+                    cur.execute(f"ALTER SEQUENCE IF EXISTS {shadow}_id_seq RENAME TO {table}_id_seq")
+                    cur.execute(f"SELECT setval(pg_get_serial_sequence(%s, 'id'), coalesce(max(id), 0) + 1, false) FROM {table}", (table,))
+
+                    cur.execute("SELECT index_params FROM vector_tables WHERE name = %s", (shadow,))
+                    row = cur.fetchone()
+                    index_params = {
+                        f"{table}{name[len(shadow):]}" if name.startswith(shadow) else name: params
+                        for name, params in (row[0] if row else {}).items()
+                    }
+                    cur.execute("DELETE FROM vector_tables WHERE name = %s", (table,))
+                    cur.execute(
+                        """
+                        UPDATE vector_tables SET name = %s, model = %s, dim = %s, metric = %s, index_params = %s::jsonb
+                        WHERE name = %s
+                        """,
+                        (table, model, dim, metric, json.dumps(index_params), shadow),
+                    )
+                conn.commit()
+            result = {"caught_up": len(missing), "removed": removed}
+        self._ready_tables.discard(shadow)
+        self._storage.pop(table, None)
+        self._storage.pop(shadow, None)
+        return result
+
+    def _register_table(self, cur, table: str, quantization: str | None = None):
+        self._ensure_registry(cur)
+        cur.execute(
+            """
+            INSERT INTO vector_tables (name, quantization) VALUES (%s, coalesce(%s, 'none'))
+            ON CONFLICT (name) DO UPDATE SET quantization = coalesce(%s, vector_tables.quantization)
+            """,
+            (table, quantization, quantization),
+        )
+
+    def _ensure_registry(self, cur):
+        if self._registry_ready:
+            return
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS vector_tables (
+            name TEXT PRIMARY KEY,
+            quantization TEXT NOT NULL DEFAULT 'none'
+        )
+        """)
+        cur.execute("""
+        ALTER TABLE vector_tables
+            ADD COLUMN IF NOT EXISTS model TEXT NULL,
+            ADD COLUMN IF NOT EXISTS dim INTEGER NULL,
+            ADD COLUMN IF NOT EXISTS metric TEXT NOT NULL DEFAULT 'cosine',
+            ADD COLUMN IF NOT EXISTS index_params JSONB NOT NULL DEFAULT '{}'::jsonb
+        """)
+        self._registry_ready = True
+
+    @staticmethod
+    def _record_index(cur, table: str, name: str, params: dict | None):
+        if params is None:
+            cur.execute("UPDATE vector_tables SET index_params = index_params - %s WHERE name = %s", (name, table))
+        else:
+            cur.execute(
+                "UPDATE vector_tables SET index_params = index_params || jsonb_build_object(%s::text, %s::jsonb) WHERE name = %s",
+                (name, json.dumps(params), table),
+            )
+
+    def save_collection(self, name: str, model: str, dim: int, metric: str = "cosine"):
+        if self.dialect is not None:
+            return self.dialect.save_collection(name, model, dim, metric)
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                self._register_table(cur, name)
+                cur.execute(
+                    "UPDATE vector_tables SET model = %s, dim = %s, metric = %s WHERE name = %s",
+                    (model, dim, metric, name),
+                )
+                conn.commit()
+
+    def list_collections(self, name: str | None = None) -> list[dict]:
+        if self.dialect is not None:
+            return self.dialect.list_collections(name)
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                self._ensure_registry(cur)
+                conn.commit()
+                cur.execute(
+                    """
+                    SELECT name, model, dim, metric, quantization, index_params
+                    FROM vector_tables WHERE %s::text IS NULL OR name = %s ORDER BY name
+                    """,
+                    (name, name),
+                )
+                return [dict(zip(self.COLLECTION_FIELDS, row)) for row in cur.fetchall()]
+
+    def get_collection(self, name: str) -> dict | None:
+        collections = self.list_collections(name)
+        return collections[0] if collections else None
+
+    @staticmethod
+    def _relation_exists(cur, name: str) -> bool:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (name,))
+        return cur.fetchone()[0]
 
     def table_exists(self, table):
         with self.connect() as conn:
@@ -0,0 +1,715 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections.abc import Iterable
+from itertools import islice
+import numpy as np
+from loguru import logger
+
+from utils.vectors import distances as vector_distances, distances_from_dots, quantize_int8, top_k, to_score
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+HNSW_SPACES = {"cosine": "cosine", "l2": "l2", "inner_product": "ip"}
+QUANTIZATION_MODES = ("none", "int8")
+QUANTIZED_BLOCK = 65536
+ROW_COLUMNS = ("id", "title", "content", "page_url", "content_hash", "section_index", "chunk_index")
+
+class LocalTable:
+    def __init__(self, directory: str, name: str, conn: sqlite3.Connection):
+        self.name = name
+        self.path = os.path.join(directory, f"{name}.f32")
+        self.index_dir = directory
+        self.dim: int | None = None
+        self.size = 0
+        self.matrix: np.memmap | None = None
+        self.slot_ids = np.empty(0, dtype=np.int64)
+        self.sq_norms = np.empty(0, dtype=np.float32)
+        self.indexes: dict[str, object] = {}
+        self.index_params: dict[str, dict] = {}
+        self.quantization = "none"
+        self.codes: np.ndarray | None = None
+        self.scales: np.ndarray | None = None
+        self._load(conn)
+
+    def _load(self, conn: sqlite3.Connection):
+        row = conn.execute("SELECT dim, quantization FROM local_tables WHERE name = ?", (self.name,)).fetchone()
+        if row is None:
+            return
+        self.quantization = row[1] or "none"
+        if row[0] is None:
+            return
+        self.dim = row[0]
+        slots = conn.execute(f"SELECT id, slot FROM {self.name}").fetchall()
+        self.size = max((slot for _, slot in slots), default=-1) + 1
+        self._reserve(0)
+        self.slot_ids = np.full(self.size, -1, dtype=np.int64)
+        for doc_id, slot in slots:
+            self.slot_ids[slot] = doc_id
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix[:self.size], self.matrix[:self.size])
+        self.set_quantization(self.quantization)
+        if hnswlib is not None:
+            for metric, space in HNSW_SPACES.items():
+                if os.path.exists(self.index_path(metric)):
+                    self._load_index(metric, space)
+
+    def _load_index(self, metric: str, space: str):
+        index = hnswlib.Index(space=space, dim=self.dim)
+        index.load_index(self.index_path(metric), max_elements=max(self.size, 1))
+        if index.get_current_count() != self.size:
+            self.build_index(metric, index.M, index.ef_construction)
+            return
+        for slot in np.flatnonzero(self.slot_ids < 0):
+            try:
+                index.mark_deleted(int(slot))
+            except RuntimeError:
+                pass
+        self.indexes[metric] = index
+        self.index_params[metric] = {"m": index.M, "ef_construction": index.ef_construction, "ef_search": 40}
+
+    @property
+    def alive(self) -> int:
+        return int(np.count_nonzero(self.slot_ids >= 0))
+
+    def _reserve(self, extra: int):
+        needed = self.size + extra
+        capacity = self.matrix.shape[0] if self.matrix is not None else 0
+        if self.matrix is not None and needed <= capacity:
+            return
+        capacity = max(1024, needed, capacity * 2)
+        if self.matrix is not None:
+            self.matrix.flush()
+            self.matrix = None
+        with open(self.path, "r+b" if os.path.exists(self.path) else "w+b") as f:
+            f.truncate(max(os.fstat(f.fileno()).st_size, capacity * self.dim * 4))
+        self.matrix = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def append(self, vectors: np.ndarray) -> np.ndarray:
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        self._reserve(len(vectors))
+        slots = np.arange(self.size, self.size + len(vectors))
+        self.matrix[slots[0]:slots[-1] + 1] = vectors
+        self.matrix.flush()
+        self.size += len(vectors)
+        self.slot_ids = np.concatenate((self.slot_ids, np.full(len(vectors), -1, dtype=np.int64)))
+        self.sq_norms = np.concatenate((self.sq_norms, np.einsum("ij,ij->i", vectors, vectors)))
+        if self.quantization == "int8":
+            codes, scales = quantize_int8(vectors)
+            self.codes = codes if self.codes is None else np.concatenate((self.codes, codes))
+            self.scales = scales if self.scales is None else np.concatenate((self.scales, scales))
+        for index in self.indexes.values():
+            index.resize_index(max(index.get_max_elements(), self.size))
+            index.add_items(vectors, slots)
+        return slots
+
+    def remove(self, slots: list[int]):
+        self.slot_ids[slots] = -1
+        for index in self.indexes.values():
+            for slot in slots:
+                try:
+                    index.mark_deleted(int(slot))
+                except RuntimeError:
+                    pass
+
+    def exact(self, query: np.ndarray, metric: str, k: int) -> tuple[np.ndarray, np.ndarray]:
+        k = min(k, self.alive)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        distances = vector_distances(self.matrix[:self.size], query, metric, self.sq_norms)
+        distances[self.slot_ids < 0] = np.inf
+        top = top_k(distances, k)
+        return top, distances[top]
+
+    def set_quantization(self, mode: str):
+        self.quantization = mode
+        if mode != "int8" or self.matrix is None:
+            self.codes = self.scales = None
+            return
+        codes, scales = [], []
+        for start in range(0, self.size, QUANTIZED_BLOCK):
+            block_codes, block_scales = quantize_int8(np.asarray(self.matrix[start:min(start + QUANTIZED_BLOCK, self.size)]))
+            codes.append(block_codes)
+            scales.append(block_scales)
+        self.codes = np.concatenate(codes) if codes else np.empty((0, self.dim), dtype=np.int8)
+        self.scales = np.concatenate(scales) if scales else np.empty(0, dtype=np.float32)
+
+    def quantized(self, query: np.ndarray, metric: str, k: int, rescore_factor: int) -> tuple[np.ndarray, np.ndarray]:
+        k = min(k, self.alive)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        dots = np.empty(self.size, dtype=np.float32)
+        for start in range(0, self.size, QUANTIZED_BLOCK):
+            end = min(start + QUANTIZED_BLOCK, self.size)
+            dots[start:end] = (self.codes[start:end].astype(np.float32) @ query) * self.scales[start:end]
+        approx = distances_from_dots(dots, query, metric, self.sq_norms)
+        approx[self.slot_ids < 0] = np.inf
+
+        candidates = top_k(approx, min(self.alive, k * rescore_factor))
+        exact = vector_distances(np.asarray(self.matrix[candidates]), query, metric, self.sq_norms[candidates])
+        order = top_k(exact, k)
+        return candidates[order], exact[order]
+
+    def approximate(self, query: np.ndarray, metric: str, k: int, ef_search: int | None) -> tuple[np.ndarray, np.ndarray]:
+        index = self.indexes[metric]
+        k = min(k, self.alive)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        index.set_ef(max(ef_search or self.index_params[metric]["ef_search"], k))
+        labels, distances = index.knn_query(query, k=k)
+        labels, distances = labels[0].astype(np.int64), distances[0]
+        if metric == "l2":
+            distances = np.sqrt(np.maximum(distances, 0))
+        elif metric == "inner_product":
+            distances = distances - 1
+        return labels, distances
+
+    def index_path(self, metric: str) -> str:
+        return os.path.join(self.index_dir, f"{self.name}.{metric}.hnsw")
+
+    def snapshot(self) -> tuple[np.memmap, np.ndarray, int]:
+        return self.matrix, np.flatnonzero(self.slot_ids >= 0), self.size
+
+    def new_index(self, metric: str, m: int, ef_construction: int, matrix: np.memmap, alive: np.ndarray, size: int):
+        if hnswlib is None:
+            raise RuntimeError("HNSW indexes for the local store require the hnswlib package")
+        index = hnswlib.Index(space=HNSW_SPACES[metric], dim=self.dim)
+        index.init_index(max_elements=max(size, 1), M=m, ef_construction=ef_construction, allow_replace_deleted=False)
+        for start in range(0, len(alive), 10000):
+            slots = alive[start:start + 10000]
+            index.add_items(np.asarray(matrix[slots]), slots)
+        return index
+
+    def install_index(self, metric: str, index, alive: np.ndarray, built_size: int, ef_search: int = 40):
+        fresh = np.arange(built_size, self.size)
+        if len(fresh):
+            index.resize_index(max(index.get_max_elements(), self.size))
+            index.add_items(np.asarray(self.matrix[built_size:self.size]), fresh)
+        indexed = np.concatenate((alive, fresh))
+        for slot in indexed[self.slot_ids[indexed] < 0]:
+            try:
+                index.mark_deleted(int(slot))
+            except RuntimeError:
+                pass
+        self.indexes[metric] = index
+        self.index_params[metric] = {"m": index.M, "ef_construction": index.ef_construction, "ef_search": ef_search}
+
+    def build_index(self, metric: str, m: int, ef_construction: int, ef_search: int = 40):
+        matrix, alive, size = self.snapshot()
+        self.install_index(metric, self.new_index(metric, m, ef_construction, matrix, alive, size), alive, size, ef_search)
+
+    def save_indexes(self):
+        for metric, index in self.indexes.items():
+            index.save_index(self.index_path(metric))
+
+    def close(self):
+        self.save_indexes()
+        if self.matrix is not None:
+            self.matrix.flush()
+
+
+class LocalVectorStore:
+    def __init__(
+        self,
+        directory: str,
+        hnsw_threshold: int = 50000,
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 64,
+        rescore_factor: int = 4,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.db_type = "local"
+        self.directory = directory
+        self.hnsw_threshold = hnsw_threshold
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.rescore_factor = rescore_factor
+        self.conn = sqlite3.connect(os.path.join(directory, "metadata.sqlite3"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS local_tables (name TEXT PRIMARY KEY, dim INTEGER NULL, quantization TEXT NULL)")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(local_tables)")}
+        for column in ("quantization", "model", "metric", "index_params"):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE local_tables ADD COLUMN {column} TEXT NULL")
+        self.conn.commit()
+        self._tables: dict[str, LocalTable] = {}
+        self._building: set[tuple[str, str]] = set()
+        self._lock = threading.RLock()
+
+    def _table(self, table: str) -> LocalTable:
+        if table not in self._tables:
+            self.ensure_vector_table(table)
+            self._tables[table] = LocalTable(self.directory, table, self.conn)
+        return self._tables[table]
+
+    def pool_stats(self) -> dict | None:
+        return None
+
+    def close(self):
+        with self._lock:
+            for local_table in self._tables.values():
+                local_table.close()
+            self.conn.close()
+
+    @staticmethod
+    def pages_table(table: str) -> str:
+        return f"{table}_pages"
+
+    def create_vector_table(self, table, dim=384):
+        with self._lock:
+            self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                slot INTEGER NOT NULL UNIQUE,
+                title TEXT,
+                content TEXT,
+                page_url TEXT NULL,
+                content_hash TEXT NULL,
+                section_index INTEGER NULL,
+                chunk_index INTEGER NULL
+            )
+            """)
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_page_url_idx ON {table} (page_url)")
+            self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.pages_table(table)} (
+                page_url TEXT PRIMARY KEY,
+                etag TEXT NULL,
+                last_modified TEXT NULL,
+                links TEXT NULL,
+                fetched_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+            if "links" not in {row[1] for row in self.conn.execute(f"PRAGMA table_info({self.pages_table(table)})")}:
+                self.conn.execute(f"ALTER TABLE {self.pages_table(table)} ADD COLUMN links TEXT NULL")
+            self.conn.execute("INSERT OR IGNORE INTO local_tables (name, dim) VALUES (?, NULL)", (table,))
+            self.conn.commit()
+
+    def ensure_vector_table(self, table, dim=384):
+        with self._lock:
+            exists = self.conn.execute("SELECT 1 FROM local_tables WHERE name = ?", (table,)).fetchone()
+        if not exists:
+            self.create_vector_table(table, dim)
+
+    def drop_table(self, table):
+        with self._lock:
+            local_table = self._tables.pop(table, None)
+            if local_table is not None:
+                local_table.matrix = None
+                local_table.indexes.clear()
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.execute(f"DROP TABLE IF EXISTS {self.pages_table(table)}")
+            self.conn.execute("DELETE FROM local_tables WHERE name = ?", (table,))
+            self.conn.commit()
+            for metric in HNSW_SPACES:
+                path = os.path.join(self.directory, f"{table}.{metric}.hnsw")
+                if os.path.exists(path):
+                    os.remove(path)
+            path = os.path.join(self.directory, f"{table}.f32")
+            if os.path.exists(path):
+                os.remove(path)
+
+    def save_collection(self, name: str, model: str, dim: int, metric: str = "cosine"):
+        self.ensure_vector_table(name, dim)
+        with self._lock:
+            self.conn.execute(
+                "UPDATE local_tables SET model = ?, dim = coalesce(dim, ?), metric = ? WHERE name = ?",
+                (model, dim, metric, name),
+            )
+            self.conn.commit()
+
+    def list_collections(self, name: str | None = None) -> list[dict]:
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT name, model, dim, coalesce(metric, 'cosine'), coalesce(quantization, 'none'), index_params
+                FROM local_tables WHERE ? IS NULL OR name = ? ORDER BY name
+                """,
+                (name, name),
+            ).fetchall()
+        return [
+            {
+                "name": row[0],
+                "model": row[1],
+                "dim": row[2],
+                "metric": row[3],
+                "quantization": row[4],
+                "index_params": json.loads(row[5]) if row[5] else {},
+            }
+            for row in rows
+        ]
+
+    def get_collection(self, name: str) -> dict | None:
+        collections = self.list_collections(name)
+        return collections[0] if collections else None
+
+    def _record_indexes(self, table: str, local_table: LocalTable):
+        params = {
+            self.index_name(table, "hnsw", metric): {"method": "hnsw", "metric": metric, "m": options["m"], "ef_construction": options["ef_construction"]}
+            for metric, options in local_table.index_params.items()
+        }
+        self.conn.execute("UPDATE local_tables SET index_params = ? WHERE name = ?", (json.dumps(params), table))
+        self.conn.commit()
+
+    def table_exists(self, table):
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM local_tables WHERE name = ?", (table,)).fetchone() is not None
+
+    def _insert_rows(self, table: str, rows: list[dict]):
+        local_table = self._table(table)
+        vectors = np.asarray([row["embedding"] for row in rows], dtype=np.float32)
+        slots = local_table.append(vectors)
+        columns = ROW_COLUMNS if "id" in rows[0] else ROW_COLUMNS[1:]
+        self.conn.executemany(
+            f"""
+            INSERT INTO {table} (slot, {", ".join(columns)})
+            VALUES (?, {", ".join("?" * len(columns))})
+            """,
+            [(int(slot), *(row.get(column) for column in columns)) for slot, row in zip(slots, rows)],
+        )
+        if local_table.size == len(rows):
+            self.conn.execute("UPDATE local_tables SET dim = ? WHERE name = ?", (local_table.dim, table))
+        self.conn.commit()
+        for doc_id, slot in self.conn.execute(f"SELECT id, slot FROM {table} WHERE slot >= ?", (int(slots[0]),)):
+            local_table.slot_ids[slot] = doc_id
+
+    def add_document(self, table: str, title, content, page_url, embedding):
+        self.bulk_add_documents(table, [{"title": title, "content": content, "page_url": page_url, "embedding": embedding}])
+
+    def add_documents(self, table: str, titles: list[str], contents: list[str], page_urls: list[str], embeddings, content_hashes: list[str] | None = None):
+        content_hashes = content_hashes or [None] * len(contents)
+        self.bulk_add_documents(table, [
+            {"title": title, "content": content, "page_url": page_url, "embedding": embedding, "content_hash": content_hash}
+            for title, content, page_url, embedding, content_hash in zip(titles, contents, page_urls, embeddings, content_hashes)
+        ])
+
+    def bulk_add_documents(self, table: str, rows: Iterable[dict], chunk_size: int = 1000) -> dict:
+        rows = iter(rows)
+        total = 0
+        start = time.perf_counter()
+        with self._lock:
+            while chunk := list(islice(rows, chunk_size)):
+                self._insert_rows(table, chunk)
+                total += len(chunk)
+            if total:
+                row = self.conn.execute("SELECT metric FROM local_tables WHERE name = ?", (table,)).fetchone()
+                self._schedule_index(self._table(table), (row[0] if row else None) or "cosine")
+        elapsed = time.perf_counter() - start
+        return {
+            "rows": total,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(total / elapsed, 1) if elapsed else None,
+        }
+
+    def fetch_rows(self, table: str, after_id: int = 0, limit: int = 1000) -> list[dict]:
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(ROW_COLUMNS)} FROM {table} WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+            ).fetchall()
+        return [dict(zip(ROW_COLUMNS, row)) for row in rows]
+
+    def count_rows(self, table: str) -> int:
+        with self._lock:
+            return self.conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+
+    def replace_table(self, table: str, shadow: str, fill, model: str, dim: int, metric: str = "cosine") -> dict:
+        with self._lock:
+            live = {row[0] for row in self.conn.execute(f"SELECT id FROM {table}")}
+            copied = {row[0] for row in self.conn.execute(f"SELECT id FROM {shadow}")}
+            self.remove_documents(shadow, sorted(copied - live))
+            missing_ids = sorted(live - copied)
+            for start in range(0, len(missing_ids), 500):
+                ids = missing_ids[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT {', '.join(ROW_COLUMNS)} FROM {table} WHERE id IN ({', '.join('?' * len(ids))}) ORDER BY id", ids
+                ).fetchall()
+                self._insert_rows(shadow, fill([dict(zip(ROW_COLUMNS, row)) for row in rows]))
+
+            for name in (table, shadow):
+                local_table = self._tables.pop(name, None)
+                if local_table is not None:
+                    local_table.close()
+                    local_table.matrix = None
+                    local_table.indexes.clear()
+
+            row = self.conn.execute("SELECT index_params FROM local_tables WHERE name = ?", (shadow,)).fetchone()
+            index_params = {
+                f"{table}{name[len(shadow):]}" if name.startswith(shadow) else name: params
+                for name, params in (json.loads(row[0]) if row and row[0] else {}).items()
+            }
+            self.conn.execute(f"DROP TABLE {table}")
+            self.conn.execute(f"DROP TABLE IF EXISTS {self.pages_table(shadow)}")
+            self.conn.execute(f"DROP INDEX IF EXISTS {shadow}_page_url_idx")
+            self.conn.execute(f"ALTER TABLE {shadow} RENAME TO {table}")
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_page_url_idx ON {table} (page_url)")
+            self.conn.execute("DELETE FROM local_tables WHERE name = ?", (table,))
+            self.conn.execute(
+                "UPDATE local_tables SET name = ?, model = ?, dim = ?, metric = ?, index_params = ? WHERE name = ?",
+                (table, model, dim, metric, json.dumps(index_params), shadow),
+            )
+            self.conn.commit()
+
+            for suffix in ("f32", *(f"{index_metric}.hnsw" for index_metric in HNSW_SPACES)):
+                source = os.path.join(self.directory, f"{shadow}.{suffix}")
+                target = os.path.join(self.directory, f"{table}.{suffix}")
+                if os.path.exists(source):
+                    os.replace(source, target)
+                elif os.path.exists(target):
+                    os.remove(target)
+        return {"caught_up": len(missing_ids), "removed": len(copied - live)}
+
+    def remove_documents(self, table: str, doc_ids: list[int]):
+        if not doc_ids:
+            return
+        with self._lock:
+            local_table = self._table(table)
+            placeholders = ", ".join("?" * len(doc_ids))
+            slots = [row[0] for row in self.conn.execute(f"SELECT slot FROM {table} WHERE id IN ({placeholders})", list(doc_ids))]
+            self.conn.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", list(doc_ids))
+            self.conn.commit()
+            local_table.remove(slots)
+
+    def remove_document(self, table: str, doc_id):
+        self.remove_documents(table, [doc_id])
+
+    def get_page_validators(self, table: str, page_url: str) -> dict | None:
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT etag, last_modified, links FROM {self.pages_table(table)} WHERE page_url = ?", (page_url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "links": json.loads(row[2]) if row[2] else None}
+
+    def save_page_validators(
+        self,
+        table: str,
+        page_url: str,
+        etag: str | None,
+        last_modified: str | None,
+        links: list[str] | None = None,
+    ):
+        with self._lock:
+            self.conn.execute(
+                f"""
+                INSERT INTO {self.pages_table(table)} (page_url, etag, last_modified, links, fetched_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (page_url) DO UPDATE
+                SET etag = excluded.etag, last_modified = excluded.last_modified,
+                    links = coalesce(excluded.links, links), fetched_at = excluded.fetched_at
+                """,
+                (page_url, etag, last_modified, json.dumps(links) if links is not None else None),
+            )
+            self.conn.commit()
+
+    def get_section_hashes(self, table: str, page_url: str) -> dict[str, list[int]]:
+        with self._lock:
+            rows = self.conn.execute(f"SELECT id, content_hash FROM {table} WHERE page_url = ? ORDER BY id", (page_url,)).fetchall()
+        hashes: dict[str, list[int]] = {}
+        for doc_id, content_hash in rows:
+            hashes.setdefault(content_hash, []).append(doc_id)
+        return hashes
+
+    def _schedule_index(self, local_table: LocalTable, metric: str):
+        key = (local_table.name, metric)
+        if (
+            hnswlib is None
+            or metric in local_table.indexes
+            or local_table.codes is not None
+            or key in self._building
+            or local_table.alive < self.hnsw_threshold
+        ):
+            return
+        self._building.add(key)
+        threading.Thread(target=self._build_index, args=(local_table, metric), name=f"hnsw-{local_table.name}", daemon=True).start()
+
+    def _build_index(self, local_table: LocalTable, metric: str):
+        table = local_table.name
+        try:
+            with self._lock:
+                matrix, alive, size = local_table.snapshot()
+            start = time.perf_counter()
+            index = local_table.new_index(metric, self.hnsw_m, self.hnsw_ef_construction, matrix, alive, size)
+            with self._lock:
+                if self._tables.get(table) is not local_table or metric in local_table.indexes:
+                    return
+                local_table.install_index(metric, index, alive, size)
+                local_table.save_indexes()
+                self._record_indexes(table, local_table)
+            logger.info(f"Built {metric} HNSW index for {table} ({len(alive)} rows) in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            logger.warning(f"Background HNSW build for {table} failed: {e}")
+        finally:
+            with self._lock:
+                self._building.discard((table, metric))
+
+    def _nearest(self, local_table: LocalTable, query_vector, metric: str, limit: int, ef_search: int | None):
+        query = np.asarray(query_vector, dtype=np.float32)
+        self._schedule_index(local_table, metric)
+        if metric in local_table.indexes:
+            return local_table.approximate(query, metric, limit, ef_search)
+        if local_table.codes is not None:
+            return local_table.quantized(query, metric, limit, self.rescore_factor)
+        return local_table.exact(query, metric, limit)
+
+    def _rows(self, table: str, local_table: LocalTable, slots, distances, metric: str) -> list[tuple]:
+        ids = [int(local_table.slot_ids[slot]) for slot in slots]
+        if not ids:
+            return []
+        placeholders = ", ".join("?" * len(ids))
+        found = {row[0]: row for row in self.conn.execute(f"SELECT id, title, content FROM {table} WHERE id IN ({placeholders})", ids)}
+        return [(*found[doc_id], to_score(distance, metric)) for doc_id, distance in zip(ids, distances) if doc_id in found]
+
+    def search(self, table: str, query_vector, metric: str = "cosine", limit=5, ef_search: int | None = None, probes: int | None = None):
+        with self._lock:
+            local_table = self._table(table)
+            slots, distances = self._nearest(local_table, query_vector, metric, limit, ef_search)
+            return self._rows(table, local_table, slots, distances, metric)
+
+    def search_many(
+        self,
+        table: str,
+        query_vectors,
+        metric: str = "cosine",
+        limit=5,
+        fuse: bool = False,
+        ef_search: int | None = None,
+        probes: int | None = None,
+    ):
+        with self._lock:
+            local_table = self._table(table)
+            hits = [self._nearest(local_table, vector, metric, limit, ef_search) for vector in query_vectors]
+            if not fuse:
+                return [self._rows(table, local_table, slots, distances, metric) for slots, distances in hits]
+
+            best: dict[int, float] = {}
+            for slots, distances in hits:
+                for slot, distance in zip(slots.tolist(), distances.tolist()):
+                    if slot not in best or distance < best[slot]:
+                        best[slot] = distance
+            ranked = sorted(best, key=best.get)
+            return self._rows(table, local_table, ranked, [best[slot] for slot in ranked], metric)
+
+    def set_quantization(self, table: str, mode: str, metric: str = "cosine", m: int = 16, ef_construction: int = 64) -> dict:
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unsupported quantization for the local store: {mode} (expected one of {', '.join(QUANTIZATION_MODES)})")
+        start = time.perf_counter()
+        with self._lock:
+            self._table(table).set_quantization(mode)
+            self.conn.execute("UPDATE local_tables SET quantization = ? WHERE name = ?", (mode, table))
+            self.conn.commit()
+        return {"quantization": mode, "build_seconds": round(time.perf_counter() - start, 3)}
+
+    def storage_stats(self, table: str) -> dict:
+        with self._lock:
+            local_table = self._table(table)
+            return {
+                "quantization": local_table.quantization,
+                "rows": local_table.alive,
+                "vector_bytes": local_table.size * (local_table.dim or 0) * 4,
+                "quantized_bytes": local_table.codes.nbytes + local_table.scales.nbytes if local_table.codes is not None else None,
+                "index_bytes": sum(
+                    os.path.getsize(local_table.index_path(metric))
+                    for metric in local_table.indexes
+                    if os.path.exists(local_table.index_path(metric))
+                ),
+            }
+
+    @staticmethod
+    def index_name(table: str, method: str, metric: str) -> str:
+        return f"{table}_embedding_{method}_{metric}_idx"
+
+    @staticmethod
+    def _check_index(method: str, metric: str):
+        if method != "hnsw":
+            raise ValueError(f"Unsupported index method for the local store: {method}")
+        if metric not in HNSW_SPACES:
+            raise ValueError(f"Unsupported metric: {metric}")
+
+    def create_index(
+        self,
+        table: str,
+        method: str = "hnsw",
+        metric: str = "cosine",
+        m: int = 16,
+        ef_construction: int = 64,
+        lists: int = 100,
+    ) -> dict:
+        self._check_index(method, metric)
+        start = time.perf_counter()
+        with self._lock:
+            local_table = self._table(table)
+            local_table.build_index(metric, m, ef_construction)
+            local_table.save_indexes()
+            self._record_indexes(table, local_table)
+        return {"index": self.index_name(table, method, metric), "build_seconds": round(time.perf_counter() - start, 3)}
+
+    def drop_index(self, table: str, method: str = "hnsw", metric: str = "cosine") -> dict:
+        self._check_index(method, metric)
+        with self._lock:
+            local_table = self._table(table)
+            local_table.indexes.pop(metric, None)
+            local_table.index_params.pop(metric, None)
+            if os.path.exists(local_table.index_path(metric)):
+                os.remove(local_table.index_path(metric))
+            self._record_indexes(table, local_table)
+        return {"index": self.index_name(table, method, metric)}
+
+    def rebuild_index(self, table: str, method: str = "hnsw", metric: str = "cosine") -> dict:
+        self._check_index(method, metric)
+        with self._lock:
+            params = self._table(table).index_params.get(metric, {"m": self.hnsw_m, "ef_construction": self.hnsw_ef_construction})
+        return self.create_index(table, method, metric, m=params["m"], ef_construction=params["ef_construction"])
+
+    def list_indexes(self, table: str) -> list[dict]:
+        with self._lock:
+            local_table = self._table(table)
+            return [
+                {
+                    "index": self.index_name(table, "hnsw", metric),
+                    "definition": f"hnsw ({HNSW_SPACES[metric]}) m={params['m']} ef_construction={params['ef_construction']}",
+                    "size_bytes": os.path.getsize(local_table.index_path(metric)) if os.path.exists(local_table.index_path(metric)) else None,
+                }
+                for metric, params in local_table.index_params.items()
+            ]
+
+    def evaluate_recall(
+        self,
+        table: str,
+        metric: str = "cosine",
+        k: int = 10,
+        sample_size: int = 50,
+        ef_search: int | None = None,
+        probes: int | None = None,
+    ) -> dict:
+        with self._lock:
+            local_table = self._table(table)
+            alive = np.flatnonzero(local_table.slot_ids >= 0)
+            samples = np.random.default_rng().choice(alive, size=min(sample_size, len(alive)), replace=False) if len(alive) else []
+
+            approx_seconds = exact_seconds = 0.0
+            recalls = []
+            for slot in samples:
+                query = np.asarray(local_table.matrix[slot])
+                start = time.perf_counter()
+                approx, _ = self._nearest(local_table, query, metric, k, ef_search)
+                approx_seconds += time.perf_counter() - start
+
+                start = time.perf_counter()
+                exact, _ = local_table.exact(query, metric, k)
+                exact_seconds += time.perf_counter() - start
+                if len(exact):
+                    recalls.append(len(set(approx.tolist()) & set(exact.tolist())) / len(exact))
+
+        n = len(samples) or 1
+        return {
+            "k": k,
+            "samples": len(samples),
+            "recall": round(sum(recalls) / len(recalls), 4) if recalls else None,
+            "approx_ms_per_query": round(approx_seconds / n * 1000, 3),
+            "exact_ms_per_query": round(exact_seconds / n * 1000, 3),
+        }
@@ -0,0 +1,388 @@
+import json
+import time
+import numpy as np
+import pymysql
+
+from utils.vectors import distances as vector_distances, top_k, to_score
+
+NATIVE_DISTANCES = {"cosine": "COSINE", "l2": "EUCLIDEAN", "inner_product": "DOT"}
+SIMHASH_BITS = 64
+SIMHASH_SEED = 20240601
+
+class MySQLVectorDialect:
+    def __init__(self, database, candidate_factor: int = 20, min_candidates: int = 200, scan_batch_size: int = 5000):
+        self.database = database
+        self.candidate_factor = candidate_factor
+        self.min_candidates = min_candidates
+        self.scan_batch_size = scan_batch_size
+        self.native: bool | None = None
+        self._storage: dict[str, str] = {}
+        self._planes: dict[int, np.ndarray] = {}
+        self._registry_ready = False
+
+    @staticmethod
+    def _cursor(conn, cursorclass=pymysql.cursors.Cursor):
+        return conn.cursor(cursorclass)
+
+    def _native_supported(self, conn) -> bool:
+        if self.native is None:
+            try:
+                with self._cursor(conn) as cur:
+                    cur.execute("SELECT DISTANCE(STRING_TO_VECTOR('[1,0]'), STRING_TO_VECTOR('[0,1]'), 'COSINE')")
+                    cur.fetchall()
+                self.native = True
+            except pymysql.MySQLError:
+                self.native = False
+        return self.native
+
+    def storage(self, conn, table: str) -> str:
+        if table not in self._storage:
+            with self._cursor(conn) as cur:
+                cur.execute(
+                    """
+                    SELECT DATA_TYPE FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = 'embedding'
+                    """,
+                    (table,),
+                )
+                row = cur.fetchone()
+            if row is None:
+                return "native" if self._native_supported(conn) else "blob"
+            self._storage[table] = "native" if row[0].lower() == "vector" else "blob"
+        return self._storage[table]
+
+    def _simhash_planes(self, dim: int) -> np.ndarray:
+        if dim not in self._planes:
+            self._planes[dim] = np.random.default_rng(SIMHASH_SEED).standard_normal((SIMHASH_BITS, dim)).astype(np.float32)
+        return self._planes[dim]
+
+    def simhash(self, vectors: np.ndarray) -> list[int]:
+        bits = (vectors @ self._simhash_planes(vectors.shape[1]).T) > 0
+        return np.packbits(bits, axis=1, bitorder="little").view("<u8").ravel().tolist()
+
+    def create_vector_table(self, table: str, dim: int = 384):
+        with self.database.connect() as conn:
+            embedding = f"VECTOR({dim})" if self._native_supported(conn) else "LONGBLOB"
+            with self._cursor(conn) as cur:
+                cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    title TEXT,
+                    content MEDIUMTEXT,
+                    page_url VARCHAR(2048) NULL,
+                    content_hash CHAR(32) NULL,
+                    section_index INT NULL,
+                    chunk_index INT NULL,
+                    embedding {embedding},
+                    simhash BIGINT UNSIGNED NULL,
+                    INDEX {table}_page_url_idx (page_url(255))
+                )
+                """)
+                cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.database.pages_table(table)} (
+                    page_url VARCHAR(768) PRIMARY KEY,
+                    etag VARCHAR(255) NULL,
+                    last_modified VARCHAR(255) NULL,
+                    links MEDIUMTEXT NULL,
+                    fetched_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+                """)
+                cur.execute(f"SHOW COLUMNS FROM {self.database.pages_table(table)} LIKE 'links'")
+                if cur.fetchone() is None:
+                    cur.execute(f"ALTER TABLE {self.database.pages_table(table)} ADD COLUMN links MEDIUMTEXT NULL")
+            conn.commit()
+            self._storage.pop(table, None)
+            self.storage(conn, table)
+
+    def drop_table(self, table: str):
+        with self.database.connect() as conn:
+            with self._cursor(conn) as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {table}, {self.database.pages_table(table)}")
+                self._ensure_registry(cur)
+                cur.execute("DELETE FROM vector_tables WHERE name = %s", (table,))
+            conn.commit()
+        self._storage.pop(table, None)
+
+    def _ensure_registry(self, cur):
+        if self._registry_ready:
+            return
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS vector_tables (
+            name VARCHAR(64) PRIMARY KEY,
+            model VARCHAR(255) NULL,
+            dim INT NULL,
+            metric VARCHAR(32) NOT NULL DEFAULT 'cosine',
+            quantization VARCHAR(16) NOT NULL DEFAULT 'none',
+            index_params JSON NULL
+        )
+        """)
+        self._registry_ready = True
+
+    def save_collection(self, name: str, model: str, dim: int, metric: str = "cosine"):
+        with self.database.connect() as conn:
+            with self._cursor(conn) as cur:
+                self._ensure_registry(cur)
+                cur.execute(
+                    """
+                    INSERT INTO vector_tables (name, model, dim, metric) VALUES (%s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE model = VALUES(model), dim = VALUES(dim), metric = VALUES(metric)
+                    """,
+                    (name, model, dim, metric),
+                )
+            conn.commit()
+
+    def list_collections(self, name: str | None = None) -> list[dict]:
+        with self.database.connect() as conn:
+            with self._cursor(conn) as cur:
+                self._ensure_registry(cur)
+                cur.execute(
+                    """
+                    SELECT name, model, dim, metric, quantization, index_params
+                    FROM vector_tables WHERE %s IS NULL OR name = %s ORDER BY name
+                    """,
+                    (name, name),
+                )
+                rows = cur.fetchall()
+            conn.commit()
+        return [
+            {**dict(zip(self.database.COLLECTION_FIELDS, row)), "index_params": json.loads(row[5]) if row[5] else {}}
+            for row in rows
+        ]
+
+    def insert_rows(self, table: str, rows: list[dict]):
+        if not rows:
+            return
+        with self.database.connect() as conn:
+            self._insert(conn, table, rows)
+            conn.commit()
+
+    def _insert(self, conn, table: str, rows: list[dict]):
+        vectors = np.asarray([row["embedding"] for row in rows], dtype=np.float32)
+        columns = ("title", "content", "page_url", "content_hash", "section_index", "chunk_index")
+        if "id" in rows[0]:
+            columns = ("id", *columns)
+        if self.storage(conn, table) == "native":
+            embedding_sql = "STRING_TO_VECTOR(%s)"
+            embeddings = ["[" + ",".join(map(str, v.tolist())) + "]" for v in vectors]
+        else:
+            embedding_sql = "%s"
+            embeddings = [v.astype("<f4").tobytes() for v in vectors]
+        hashes = self.simhash(vectors)
+        with self._cursor(conn) as cur:
+            cur.executemany(
+                f"""
+                INSERT INTO {table} ({", ".join(columns)}, embedding, simhash)
+                VALUES ({", ".join(["%s"] * len(columns))}, {embedding_sql}, %s)
+                """,
+                [
+                    (*(row.get(c) for c in columns), embedding, simhash)
+                    for row, embedding, simhash in zip(rows, embeddings, hashes)
+                ],
+            )
+
+    def fetch_rows(self, table: str, after_id: int = 0, limit: int = 1000) -> list[dict]:
+        columns = self.database.ROW_COLUMNS
+        with self.database.connect() as conn:
+            with self._cursor(conn) as cur:
+                cur.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE id > %s ORDER BY id LIMIT %s", (after_id, limit))
+                rows = cur.fetchall()
+            conn.commit()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def count_rows(self, table: str) -> int:
+        with self.database.connect() as conn:
+            with self._cursor(conn) as cur:
+                cur.execute(f"SELECT count(*) FROM {table}")
+                return cur.fetchone()[0]
+
+    def replace_table(self, table: str, shadow: str, fill, model: str, dim: int, metric: str = "cosine") -> dict:
+        columns = self.database.ROW_COLUMNS
+        retired = f"{shadow}_old"
+        with self.database.connect() as conn:
+            with self._cursor(conn) as cur:
+                self._ensure_registry(cur)
+                cur.execute(f"LOCK TABLES {table} WRITE, {shadow} WRITE, vector_tables WRITE")
+                try:
+                    cur.execute(f"DELETE FROM {shadow} WHERE id NOT IN (SELECT id FROM {table})")
+                    removed = cur.rowcount
+                    cur.execute(
+                        f"SELECT {', '.join(columns)} FROM {table} WHERE id NOT IN (SELECT id FROM {shadow}) ORDER BY id"
+                    )
+                    missing = [dict(zip(columns, row)) for row in cur.fetchall()]
+                    if missing:
+                        self._insert(conn, shadow, fill(missing))
+                    cur.execute(f"RENAME TABLE {table} TO {retired}, {shadow} TO {table}")
+                    cur.execute(
+                        """
+                        INSERT INTO vector_tables (name, model, dim, metric) VALUES (%s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE model = VALUES(model), dim = VALUES(dim), metric = VALUES(metric)
+                        """,
+                        (table, model, dim, metric),
+                    )
+                    cur.execute("DELETE FROM vector_tables WHERE name = %s", (shadow,))
+                    conn.commit()
+                finally:
+                    cur.execute("UNLOCK TABLES")
+                cur.execute(f"DROP TABLE IF EXISTS {retired}, {self.database.pages_table(shadow)}")
+            conn.commit()
+        self._storage.pop(table, None)
+        self._storage.pop(shadow, None)
+        return {"caught_up": len(missing), "removed": removed}
+
+    def remove_documents(self, table: str, doc_ids: list[int]):
+        if not doc_ids:
+            return
+        with self.database.connect() as conn:
+            with self._cursor(conn) as cur:
+                cur.execute(f"DELETE FROM {table} WHERE id IN %s", (list(doc_ids),))
+            conn.commit()
+
+    def get_page_validators(self, table: str, page_url: str) -> dict | None:
+        with self.database.connect() as conn:
+            with self._cursor(conn) as cur:
+                cur.execute(
+                    f"SELECT etag, last_modified, links FROM {self.database.pages_table(table)} WHERE page_url = %s",
+                    (page_url,),
+                )
+                row = cur.fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "links": json.loads(row[2]) if row[2] else None}
+
+    def save_page_validators(
+        self,
+        table: str,
+        page_url: str,
+        etag: str | None,
+        last_modified: str | None,
+        links: list[str] | None = None,
+    ):
+        with self.database.connect() as conn:
+            with self._cursor(conn) as cur:
+                cur.execute(
+                    f"""
+                    INSERT INTO {self.database.pages_table(table)} (page_url, etag, last_modified, links, fetched_at)
+                    VALUES (%s, %s, %s, %s, NOW())
+                    ON DUPLICATE KEY UPDATE
+                    etag = VALUES(etag), last_modified = VALUES(last_modified),
+                    links = COALESCE(VALUES(links), links), fetched_at = VALUES(fetched_at)
+                    """,
+                    (page_url, etag, last_modified, json.dumps(links) if links is not None else None),
+                )
+            conn.commit()
+
+    def get_section_hashes(self, table: str, page_url: str) -> dict[str, list[int]]:
+        with self.database.connect() as conn:
+            with self._cursor(conn) as cur:
+                cur.execute(f"SELECT id, content_hash FROM {table} WHERE page_url = %s ORDER BY id", (page_url,))
+                rows = cur.fetchall()
+        hashes: dict[str, list[int]] = {}
+        for doc_id, content_hash in rows:
+            hashes.setdefault(content_hash, []).append(doc_id)
+        return hashes
+
+    def _native_nearest(self, cur, table: str, query: np.ndarray, metric: str, limit: int) -> list[tuple]:
+        distance = f"DISTANCE(embedding, STRING_TO_VECTOR(%s), '{NATIVE_DISTANCES.get(metric, 'COSINE')}')"
+        if metric == "inner_product":
+            distance = f"-{distance}"
+        cur.execute(
+            f"SELECT id, title, content, {distance} AS distance FROM {table} ORDER BY distance LIMIT %s",
+            ("[" + ",".join(map(str, query.tolist())) + "]", limit),
+        )
+        return list(cur.fetchall())
+
+    def _rescore(self, rows: list[tuple], query: np.ndarray, metric: str, limit: int) -> list[tuple]:
+        if not rows:
+            return []
+        matrix = np.stack([np.frombuffer(row[3], dtype="<f4") for row in rows])
+        dist = vector_distances(matrix, query, metric)
+        return [(*rows[i][:3], float(dist[i])) for i in top_k(dist, limit)]
+
+    def _prefiltered_nearest(self, cur, table: str, query: np.ndarray, metric: str, limit: int) -> list[tuple]:
+        candidates = max(limit * self.candidate_factor, self.min_candidates)
+        cur.execute(
+            f"""
+            SELECT d.id, d.title, d.content, d.embedding
+            FROM (SELECT id FROM {table} ORDER BY BIT_COUNT(simhash ^ %s) LIMIT %s) c
+            JOIN {table} d ON d.id = c.id
+            """,
+            (self.simhash(query[None, :])[0], candidates),
+        )
+        return self._rescore(list(cur.fetchall()), query, metric, limit)
+
+    def _exact_nearest(self, conn, table: str, query: np.ndarray, metric: str, limit: int) -> list[tuple]:
+        best_ids = np.empty(0, dtype=np.int64)
+        best_dist = np.empty(0, dtype=np.float32)
+        with self._cursor(conn, pymysql.cursors.SSCursor) as cur:
+            cur.execute(f"SELECT id, embedding FROM {table}")
+            while batch := cur.fetchmany(self.scan_batch_size):
+                ids = np.fromiter((row[0] for row in batch), dtype=np.int64, count=len(batch))
+                matrix = np.stack([np.frombuffer(row[1], dtype="<f4") for row in batch])
+                best_ids = np.concatenate((best_ids, ids))
+                best_dist = np.concatenate((best_dist, vector_distances(matrix, query, metric)))
+                keep = top_k(best_dist, limit)
+                best_ids, best_dist = best_ids[keep], best_dist[keep]
+        if not len(best_ids):
+            return []
+        with self._cursor(conn) as cur:
+            cur.execute(f"SELECT id, title, content FROM {table} WHERE id IN %s", (best_ids.tolist(),))
+            found = {row[0]: row for row in cur.fetchall()}
+        return [(*found[doc_id], float(d)) for doc_id, d in zip(best_ids.tolist(), best_dist) if doc_id in found]
+
+    def nearest(self, conn, table: str, query_vector, metric: str, limit: int, exact: bool = False) -> list[tuple]:
+        query = np.asarray(query_vector, dtype=np.float32)
+        if self.storage(conn, table) == "native":
+            with self._cursor(conn) as cur:
+                return self._native_nearest(cur, table, query, metric, limit)
+        if exact:
+            return self._exact_nearest(conn, table, query, metric, limit)
+        with self._cursor(conn) as cur:
+            return self._prefiltered_nearest(cur, table, query, metric, limit)
+
+    def search(self, table: str, query_vector, metric: str = "cosine", limit=5):
+        with self.database.connect() as conn:
+            rows = self.nearest(conn, table, query_vector, metric, limit)
+        return [(doc_id, title, content, to_score(distance, metric)) for doc_id, title, content, distance in rows]
+
+    def search_many(self, table: str, query_vectors, metric: str = "cosine", limit=5, fuse: bool = False):
+        with self.database.connect() as conn:
+            hits = [self.nearest(conn, table, vector, metric, limit) for vector in query_vectors]
+        if not fuse:
+            return [[(*row[:3], to_score(row[3], metric)) for row in rows] for rows in hits]
+
+        best: dict[int, tuple] = {}
+        for rows in hits:
+            for row in rows:
+                if row[0] not in best or row[3] < best[row[0]][3]:
+                    best[row[0]] = row
+        return [(*row[:3], to_score(row[3], metric)) for row in sorted(best.values(), key=lambda row: row[3])]
+
+    def evaluate_recall(self, table: str, metric: str = "cosine", k: int = 10, sample_size: int = 50) -> dict:
+        with self.database.connect() as conn:
+            if self.storage(conn, table) == "native":
+                raise ValueError("Recall evaluation compares the SimHash pre-filter with an exact scan; native VECTOR tables are searched exactly")
+            with self._cursor(conn) as cur:
+                cur.execute(f"SELECT embedding FROM {table} ORDER BY RAND() LIMIT %s", (sample_size,))
+                samples = [np.frombuffer(row[0], dtype="<f4") for row in cur.fetchall()]
+
+            approx_seconds = exact_seconds = 0.0
+            recalls = []
+            for query in samples:
+                start = time.perf_counter()
+                approx = {row[0] for row in self.nearest(conn, table, query, metric, k)}
+                approx_seconds += time.perf_counter() - start
+
+                start = time.perf_counter()
+                exact = {row[0] for row in self.nearest(conn, table, query, metric, k, exact=True)}
+                exact_seconds += time.perf_counter() - start
+                if exact:
+                    recalls.append(len(approx & exact) / len(exact))
+
+        n = len(samples) or 1
+        return {
+            "k": k,
+            "samples": len(samples),
+            "recall": round(sum(recalls) / len(recalls), 4) if recalls else None,
+            "approx_ms_per_query": round(approx_seconds / n * 1000, 3),
+            "exact_ms_per_query": round(exact_seconds / n * 1000, 3),
+        }
@@ -3,9 +3,12 @@ from .settings import (
     parse_settings,
     PostgresSettings,
     MySQLSettings,
+    LocalSettings,
     DatabaseType,
     PostgresMetric,
     MySQLMetric,
+    LocalMetric,
+    RetrievalMode,
     LLMProvider
 )
 
@@ -14,8 +17,11 @@ __all__ = [
     "parse_settings", 
     "PostgresSettings",
     "MySQLSettings",
+    "LocalSettings",
     "DatabaseType",
     "PostgresMetric",
     "MySQLMetric",
+    "LocalMetric",
+    "RetrievalMode",
     "LLMProvider"
 ]
\ No newline at end of file
@@ -5,6 +5,7 @@ from pydantic import BaseModel
 class DatabaseType(str, Enum):
     postgres = "postgres"
     mysql = "mysql"
+    local = "local"
 
 class PostgresMetric(str, Enum):
     cosine = "cosine"
@@ -14,6 +15,14 @@ class MySQLMetric(str, Enum):
     cosine = "cosine"
     l2 = "l2"
 
+class LocalMetric(str, Enum):
+    cosine = "cosine"
+    l2 = "l2"
+
+class RetrievalMode(str, Enum):
+    vector = "vector"
+    hybrid = "hybrid"
+
 class LLMProvider(str, Enum):
     Ollama = "ollama"
     OpenAI = "openai"
@@ -24,16 +33,36 @@ class PostgresSettings(BaseModel):
     metric: PostgresMetric
     llmProvider: LLMProvider
     textEncoder: str = "all-MiniLM-L6-v2"
+    reranker: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
     openAiApiKey: Optional[str] = None
+    semanticCacheThreshold: float = 0.95
+    retrievalDeadline: Optional[float] = None
+    efSearch: Optional[int] = None
+    ivfProbes: Optional[int] = None
+    retrievalMode: RetrievalMode = RetrievalMode.vector
 
 class MySQLSettings(BaseModel):
     database: Literal[DatabaseType.mysql]
     metric: MySQLMetric
     llmProvider: LLMProvider
     textEncoder: str = "all-MiniLM-L6-v2"
+    reranker: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    openAiApiKey: Optional[str] = None
+    semanticCacheThreshold: float = 0.95
+    retrievalDeadline: Optional[float] = None
+
+class LocalSettings(BaseModel):
+    database: Literal[DatabaseType.local]
+    metric: LocalMetric
+    llmProvider: LLMProvider
+    textEncoder: str = "all-MiniLM-L6-v2"
+    reranker: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
     openAiApiKey: Optional[str] = None
+    semanticCacheThreshold: float = 0.95
+    retrievalDeadline: Optional[float] = None
+    efSearch: Optional[int] = None
 
-Settings = Union[PostgresSettings, MySQLSettings]
+Settings = Union[PostgresSettings, MySQLSettings, LocalSettings]
 
 def parse_settings(payload: dict) -> Settings:
     db = payload.get("database")
@@ -41,5 +70,7 @@ def parse_settings(payload: dict) -> Settings:
         return PostgresSettings(**payload)
     elif db == DatabaseType.mysql:
         return MySQLSettings(**payload)
+    elif db == DatabaseType.local:
+        return LocalSettings(**payload)
     else:
         raise ValueError("Invalid database type")
\ No newline at end of file
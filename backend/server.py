@@ -1,14 +1,23 @@
-from flask import Flask, request, jsonify, g
+from flask import Flask, Response, request, jsonify, g, stream_with_context
 from flask_cors import CORS
 
 from database import Database
-from utils.helpers import clean_documents, clean_text
-from services.text_service import text_encoder
-from services.llm_service import expand_query, call_llm
-from services.search_service import rerank_documents
+from local_store import LocalVectorStore
+from utils.helpers import clean_text
+from services.text_service import encoder_registry
+from services.collection_service import collection_manager
+from services.reembed_service import reembedder
+from services.llm_service import stream_expanded_queries, call_llm, stream_llm
+from services.llm_providers import provider_registry
+from services.search_service import reranker
+from services.retrieval_service import retriever
+from services.semantic_cache import semantic_cache
+from services.ingest_service import job_manager, crawl_source, crawl_stages, document_stages
 import os
+import atexit
 from dotenv import load_dotenv
-from crawlers import Crawler
+from crawlers import browser_pool, section_parser, HttpFetcher, PageFetcher, SiteCrawler
+from crawlers.frontier import DEFAULT_EXCLUDE
 
 from schemas.settings import (
     parse_settings,
@@ -16,7 +25,8 @@ from schemas.settings import (
     PostgresSettings,
     DatabaseType,
     PostgresMetric,
-    LLMProvider
+    LLMProvider,
+    RetrievalMode,
 )
 
 app = Flask(__name__)
@@ -36,16 +46,45 @@ pg_db = Database(
     port=int(os.getenv("POSTGRES_PORT", "5432")), 
     user=os.getenv("POSTGRES_USER", "postgres"), 
     password=os.getenv("POSTGRES_PASSWORD"), 
-    db_name=os.getenv("POSTGRES_DB", "test")
+    db_name=os.getenv("POSTGRES_DB", "test"),
+    pool=os.getenv("POSTGRES_POOL", "true").lower() == "true",
+    pool_min_size=int(os.getenv("POSTGRES_POOL_MIN_SIZE", "2")),
+    pool_max_size=int(os.getenv("POSTGRES_POOL_MAX_SIZE", "10")),
+    pool_max_idle=float(os.getenv("POSTGRES_POOL_MAX_IDLE", "600")),
+    text_search_config=os.getenv("POSTGRES_TEXT_SEARCH_CONFIG", "simple"),
+    rescore_factor=int(os.getenv("RESCORE_FACTOR", "4")),
 )
-# mysql_db = Database(
-#     db_type="mysql", 
-#     host=os.getenv("MYSQL_HOST", "localhost"), 
-#     port=int(os.getenv("MYSQL_PORT", "3306")), 
-#     user=os.getenv("MYSQL_USER", "mysql"), 
-#     password=os.getenv("MYSQL_PASSWORD"), 
-#     db_name=os.getenv("MYSQL_DB", "test")
-# )
+atexit.register(pg_db.close)
+
+local_db = LocalVectorStore(
+    directory=os.getenv("LOCAL_STORE_DIR", "local_store"),
+    hnsw_threshold=int(os.getenv("LOCAL_HNSW_THRESHOLD", "50000")),
+    rescore_factor=int(os.getenv("RESCORE_FACTOR", "4")),
+)
+atexit.register(local_db.close)
+atexit.register(browser_pool.close)
+
+page_fetcher = PageFetcher(
+    HttpFetcher(
+        pool_size=int(os.getenv("HTTP_POOL_SIZE", "10")),
+        timeout=float(os.getenv("HTTP_TIMEOUT", "10")),
+    ),
+    browser_pool,
+)
+mysql_db = Database(
+    db_type="mysql", 
+    host=os.getenv("MYSQL_HOST", "localhost"), 
+    port=int(os.getenv("MYSQL_PORT", "3306")), 
+    user=os.getenv("MYSQL_USER", "mysql"), 
+    password=os.getenv("MYSQL_PASSWORD"), 
+    db_name=os.getenv("MYSQL_DB", "test"),
+    pool=True,
+    pool_min_size=int(os.getenv("MYSQL_POOL_MIN_SIZE", "1")),
+    pool_max_size=int(os.getenv("MYSQL_POOL_MAX_SIZE", "10")),
+    mysql_candidate_factor=int(os.getenv("MYSQL_CANDIDATE_FACTOR", "20")),
+) if os.getenv("MYSQL_HOST") else None
+if mysql_db is not None:
+    atexit.register(mysql_db.close)
 
 class SettingsStore:
     def __init__(self, initial: Settings):
@@ -59,11 +98,23 @@ class SettingsStore:
 
 settings_store = SettingsStore(DEFAULT_SETTINGS)
 
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "100"))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+CRAWL_HOST_DELAY = float(os.getenv("CRAWL_HOST_DELAY", "1.0"))
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+SCORE_FIELDS = {"cosine": "similarity_percent", "l2": "l2_distance", "inner_product": "inner_product_score"}
+
 def get_db_by_type(db_type: str) -> Database:
     if db_type == DatabaseType.postgres:
         return pg_db
-    # elif db_type == DatabaseType.mysql:
-    #     return mysql_db
+    elif db_type == DatabaseType.local:
+        return local_db
+    elif db_type == DatabaseType.mysql:
+        if mysql_db is None:
+            raise ValueError("MySQL is not configured (set MYSQL_HOST)")
+        return mysql_db
     else:
         raise ValueError("Invalid db type")
 
@@ -71,6 +122,10 @@ def get_db_from_settings() -> Database:
     s = settings_store.get_settings()
     return get_db_by_type(s.database)
 
+def get_collection(db, name: str | None, current_settings: Settings, create: bool = False) -> dict:
+    resolve = collection_manager.ensure if create else collection_manager.resolve
+    return resolve(db, name, current_settings.textEncoder, current_settings.metric.value)
+
 
 @app.before_request
 def setup_database():
@@ -97,6 +152,128 @@ def load_settings():
         return jsonify({"status": "error", "message": str(e)}), 400
 
 
+@app.route("/stats", methods=["GET", "OPTIONS"])
+def load_stats():
+    if request.method == "OPTIONS":
+        return "", 204
+
+    return jsonify({
+        "database": {"postgres": pg_db.pool_stats(), "mysql": mysql_db.pool_stats() if mysql_db else None},
+        "reranker": reranker.metrics(),
+        "retrieval": retriever.metrics(),
+        "llm_providers": provider_registry.stats(),
+        "browser_pool": browser_pool.stats(),
+        "fetch_strategies": page_fetcher.stats(),
+        "embedding_cache": encoder_registry.stats(),
+        "semantic_cache": semantic_cache.stats(),
+    }), 200
+
+
+@app.route("/collections", methods=["GET", "POST", "OPTIONS"])
+def manage_collections():
+    if request.method == "OPTIONS":
+        return "", 204
+
+    try:
+        if request.method == "GET":
+            return jsonify({"status": "success", "collections": collection_manager.list(g.db)}), 200
+
+        data = request.get_json()
+        current_settings = settings_store.get_settings()
+        collection = collection_manager.ensure(
+            g.db,
+            data["name"],
+            data.get("model") or current_settings.textEncoder,
+            data.get("metric") or current_settings.metric.value,
+        )
+        return jsonify({"status": "success", "collection": collection}), 200
+    except Exception as e:
+        app.logger.error(f"An error occurred while managing collections: {e!s}")
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+
+@app.route("/collections/<name>/reembed", methods=["POST", "OPTIONS"])
+def reembed_collection(name):
+    if request.method == "OPTIONS":
+        return "", 204
+
+    app.logger.info(f"Start re-embedding collection {name}")
+
+    data = request.get_json(silent=True) or {}
+    try:
+        job = reembedder.start(g.db, name, data.get("model") or settings_store.get_settings().textEncoder)
+    except KeyError as e:
+        return jsonify({"status": "error", "message": str(e.args[0])}), 404
+    except Exception as e:
+        app.logger.error(f"An error occurred while starting re-embedding: {e!s}")
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "accepted", "job_id": job.id, "collection": name}), 202
+
+
+@app.route("/index", methods=["GET", "POST", "OPTIONS"])
+def manage_index():
+    if request.method == "OPTIONS":
+        return "", 204
+
+    current_settings = settings_store.get_settings()
+    if request.method == "GET":
+        try:
+            collection = get_collection(g.db, request.args.get("collection"), current_settings)
+            return jsonify({"status": "success", "indexes": g.db.list_indexes(collection["name"])}), 200
+        except Exception as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
+    app.logger.info("Start managing index")
+
+    data = request.get_json()
+    action = data.get("action", "create")
+    method = data.get("method", "hnsw")
+
+    try:
+        collection = get_collection(g.db, data.get("collection"), current_settings)
+        table = collection["name"]
+        metric = data.get("metric", collection["metric"])
+        if action == "create":
+            result = g.db.create_index(
+                table,
+                method=method,
+                metric=metric,
+                m=data.get("m", 16),
+                ef_construction=data.get("efConstruction", 64),
+                lists=data.get("lists", 100),
+            )
+        elif action == "rebuild":
+            result = g.db.rebuild_index(table, method=method, metric=metric)
+        elif action == "quantize":
+            result = g.db.set_quantization(
+                table,
+                data.get("quantization", "halfvec"),
+                metric=metric,
+                m=data.get("m", 16),
+                ef_construction=data.get("efConstruction", 64),
+            )
+        elif action == "drop":
+            result = g.db.drop_index(table, method=method, metric=metric)
+            collection_manager.forget(g.db, table)
+            return jsonify({"status": "success", **result}), 200
+        else:
+            raise ValueError(f"Unsupported action: {action}")
+
+        collection_manager.forget(g.db, table)
+        result["evaluation"] = g.db.evaluate_recall(
+            table,
+            metric=metric,
+            k=data.get("k", 10),
+            sample_size=data.get("sampleSize", 50),
+            ef_search=getattr(current_settings, "efSearch", None),
+            probes=getattr(current_settings, "ivfProbes", None),
+        )
+        return jsonify({"status": "success", **result}), 200
+    except Exception as e:
+        app.logger.error(f"An error occurred while managing index: {e!s}")
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+
 @app.route("/update-settings", methods=["POST", "OPTIONS"])
 def update_settings():
     if request.method == "OPTIONS":
@@ -112,7 +289,7 @@ def update_settings():
         
         if hasattr(new_settings, 'textEncoder'):
             try:
-                text_encoder.update_model(new_settings.textEncoder)
+                encoder_registry.get(new_settings.textEncoder)
                 app.logger.info("Text encoder updated successfully", new_settings.textEncoder)
             except Exception as encoder_error:
                 app.logger.error(f"Failed to update text encoder: {encoder_error}")
@@ -121,8 +298,50 @@ def update_settings():
                     "message": f"Failed to load text encoder model '{new_settings.textEncoder}': {str(encoder_error)}"
                 }), 400
         
+        if hasattr(new_settings, 'reranker'):
+            try:
+                reranker.update_model(new_settings.reranker)
+            except Exception as reranker_error:
+                app.logger.error(f"Failed to update reranker: {reranker_error}")
+                return jsonify({
+                    "status": "error",
+                    "message": f"Failed to load reranker model '{new_settings.reranker}': {str(reranker_error)}"
+                }), 400
+
+        old_settings = settings_store.get_settings()
+        if (old_settings.llmProvider, old_settings.openAiApiKey) != (new_settings.llmProvider, new_settings.openAiApiKey):
+            provider_registry.clear()
+
         settings_store.set_settings(new_settings)
-        return jsonify({"status": "success", "settings": new_settings.model_dump()}), 200
+
+        reembed_job_id = None
+        warnings = []
+        try:
+            db = get_db_by_type(new_settings.database)
+            collection = collection_manager.get(db, collection_manager.default)
+        except Exception as collection_error:
+            app.logger.error(f"Failed to load the default collection: {collection_error}")
+            db = collection = None
+
+        if collection is not None and collection.get("metric") not in (None, new_settings.metric.value):
+            warnings.append(
+                f"Collection '{collection['name']}' keeps its '{collection['metric']}' metric; "
+                f"'{new_settings.metric.value}' only applies to new collections"
+            )
+
+        if new_settings.textEncoder != old_settings.textEncoder and collection is not None:
+            try:
+                if collection.get("model") not in (None, new_settings.textEncoder):
+                    reembed_job_id = reembedder.start(db, collection["name"], new_settings.textEncoder).id
+            except Exception as reembed_error:
+                app.logger.error(f"Failed to start re-embedding: {reembed_error}")
+
+        return jsonify({
+            "status": "success",
+            "settings": new_settings.model_dump(),
+            "reembed_job_id": reembed_job_id,
+            "warnings": warnings,
+        }), 200
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
     
@@ -135,28 +354,43 @@ def crawl_link():
     app.logger.info("Start crawling")
 
     data = request.get_json()
-    link = data["link"]
-    crawler = Crawler()
+    seeds = data.get("seeds") or [data["link"]]
+    depth = int(data.get("depth", 0))
+    db = g.db
+
+    incremental = bool(data.get("incremental", True))
 
     try:
-        sections = crawler.extract(link=link)
-        exists = g.db.table_exists("glo_table")
-        if not exists:
-            g.db.create_vector_table("glo_table")
-        cleaned_docs = clean_documents([s.get('text') for s in sections])
-        vectors = text_encoder.encode(cleaned_docs)
-        contents = cleaned_docs
-        titles = [s.get('title') for s in sections]
-        page_urls = [s.get('page_url') for s in sections]
-
-        g.db.add_documents("glo_table", titles, contents, page_urls, vectors)
-        return jsonify({"status": "success", "titles": titles}), 200
+        collection = get_collection(db, data.get("collection"), settings_store.get_settings(), create=True)
+        table = collection["name"]
+        site_crawler = SiteCrawler(
+            page_fetcher,
+            max_depth=depth,
+            max_pages=int(data.get("maxPages", CRAWL_MAX_PAGES)),
+            include=data.get("include") or (),
+            exclude=data.get("exclude") or DEFAULT_EXCLUDE,
+            concurrency=CRAWL_CONCURRENCY,
+            host_delay=CRAWL_HOST_DELAY,
+            validators=(lambda url: db.get_page_validators(table, url)) if incremental else None,
+        )
     except Exception as e:
         app.logger.error(f"An error occurred while crawling: {e!s}")
         return jsonify({"status": "error", "message": str(e)}), 400
-    finally:
-        if crawler:
-            crawler.close()
+
+    job = job_manager.submit(
+        "crawl",
+        crawl_source(site_crawler, seeds),
+        crawl_stages(
+            db,
+            table,
+            section_parser,
+            chunk_size=INGEST_CHUNK_SIZE,
+            incremental=incremental,
+            encoder=collection_manager.encoder(collection),
+        ),
+        total=len(seeds) if depth == 0 else None,
+    )
+    return jsonify({"status": "accepted", "job_id": job.id, "collection": table}), 202
 
 
 @app.route("/add", methods=["POST", "OPTIONS"])
@@ -168,21 +402,44 @@ def add_documents():
     
     data = request.get_json()
     documents = data["contents"]
+    db = g.db
 
-    exists = g.db.table_exists("glo_table")
-    if not exists:
-        g.db.create_vector_table("glo_table")
+    try:
+        collection = get_collection(db, data.get("collection"), settings_store.get_settings(), create=True)
+    except Exception as e:
+        app.logger.error(f"An error occurred while adding documents: {e!s}")
+        return jsonify({"status": "error", "message": str(e)}), 400
 
-    cleaned_docs = clean_documents(documents)
-    vectors = text_encoder.encode(cleaned_docs)
-    contents = cleaned_docs
-    titles = [f"Document {i+1}" for i in range(len(contents))]
-    page_urls = [None for _ in contents]
+    docs = [{"title": f"Document {i+1}", "text": text, "page_url": None} for i, text in enumerate(documents)]
+    batches = [{"docs": docs[i:i + INGEST_BATCH_SIZE]} for i in range(0, len(docs), INGEST_BATCH_SIZE)]
 
-    g.db.add_documents("glo_table", titles, contents, page_urls, vectors)
-    
-    db_type = "postgres" if g.db == pg_db else "mysql"
-    return jsonify({"status": "success", "database": db_type}), 200
+    job = job_manager.submit(
+        "add",
+        batches,
+        document_stages(db, collection["name"], chunk_size=INGEST_CHUNK_SIZE, encoder=collection_manager.encoder(collection)),
+        total=len(batches),
+    )
+
+    return jsonify({"status": "accepted", "job_id": job.id, "database": db.db_type, "collection": collection["name"]}), 202
+
+
+@app.route("/jobs", methods=["GET", "OPTIONS"])
+def list_jobs():
+    if request.method == "OPTIONS":
+        return "", 204
+
+    return jsonify({"jobs": [job.to_dict() for job in job_manager.list()]}), 200
+
+
+@app.route("/jobs/<job_id>", methods=["GET", "OPTIONS"])
+def get_job(job_id):
+    if request.method == "OPTIONS":
+        return "", 204
+
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Unknown job '{job_id}'"}), 404
+    return jsonify(job.to_dict()), 200
 
 
 @app.route("/search", methods=["POST", "OPTIONS"])
@@ -197,37 +454,134 @@ def search_documents():
     limit = data.get("limit", 5)
 
     current_settings = settings_store.get_settings()
-    metric = current_settings.metric
-    
-    cleaned_query = clean_text(query)
-    vector = text_encoder.encode(cleaned_query)[0]
+    try:
+        collection = get_collection(g.db, data.get("collection"), current_settings)
+    except KeyError as e:
+        return jsonify({"status": "error", "message": str(e.args[0])}), 404
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    table = collection["name"]
+    metric = collection["metric"]
 
-    results = g.db.search("glo_table", vector, metric=metric, limit=limit)
+    cleaned_query = clean_text(query)
+    vector = collection_manager.encoder(collection).encode(cleaned_query)[0]
+
+    if getattr(current_settings, "retrievalMode", RetrievalMode.vector) == RetrievalMode.hybrid:
+        results = g.db.hybrid_search(
+            table,
+            cleaned_query,
+            vector,
+            metric=metric,
+            limit=limit,
+            candidates=max(HYBRID_CANDIDATES, limit),
+            ef_search=getattr(current_settings, "efSearch", None),
+            probes=getattr(current_settings, "ivfProbes", None),
+        )
+    else:
+        results = g.db.search(
+            table,
+            vector,
+            metric=metric,
+            limit=limit,
+            ef_search=getattr(current_settings, "efSearch", None),
+            probes=getattr(current_settings, "ivfProbes", None),
+        )
     
     serializable_results = []
     for r in results:
-        result_dict = {
+        serializable_results.append({
             "id": r[0], 
             "title": r[1],
-            "content": r[2]
-        }
-        
-        if metric == "cosine":
-            result_dict["similarity_percent"] = r[3]
-        elif metric == "l2":
-            result_dict["l2_distance"] = r[3]
-        elif metric == "inner_product":
-            result_dict["inner_product_score"] = r[3]
-        
-        serializable_results.append(result_dict)
+            "content": r[2],
+            SCORE_FIELDS.get(metric, "similarity_percent"): r[3],
+        })
     
     return jsonify({
         "results": serializable_results,
+        "collection": table,
         "metric_used": metric,
         "total_results": len(serializable_results)
     }), 200
 
 
+def retrieve_documents(db, query: str, current_settings: Settings, collection: dict, query_vector=None) -> tuple[list[dict], bool]:
+    provider = current_settings.llmProvider
+    api_key = current_settings.openAiApiKey
+    table = collection["name"]
+    metric = collection["metric"]
+
+    scope = f"expansion:{provider}:{collection['model']}"
+    cached = semantic_cache.get(scope, None, query, query_vector, current_settings.semanticCacheThreshold)
+    if cached is not None:
+        expansions = cached[1:]
+    else:
+        expansions = stream_expanded_queries(
+            query, 
+            expand_to_n=4, 
+            provider=provider, 
+            model_name="", 
+            api_key=api_key if provider == LLMProvider.OpenAI else None
+        )
+
+    hybrid = getattr(current_settings, "retrievalMode", RetrievalMode.vector) == RetrievalMode.hybrid
+
+    def search(text, vector):
+        if hybrid:
+            return db.hybrid_search(
+                table,
+                text,
+                vector,
+                metric=metric,
+                limit=5,
+                candidates=HYBRID_CANDIDATES,
+                ef_search=getattr(current_settings, "efSearch", None),
+                probes=getattr(current_settings, "ivfProbes", None),
+            )
+        return db.search(
+            table,
+            vector,
+            metric=metric,
+            limit=5,
+            ef_search=getattr(current_settings, "efSearch", None),
+            probes=getattr(current_settings, "ivfProbes", None),
+        )
+
+    retrieval = retriever.retrieve(
+        query,
+        search,
+        expansions,
+        query_vector=query_vector,
+        top_k=5,
+        deadline=current_settings.retrievalDeadline,
+        on_expanded=None if cached is not None else lambda queries: semantic_cache.put(scope, None, query, queries, query_vector),
+        encoder=collection_manager.encoder(collection),
+        higher_is_better=metric == "cosine",
+        search_many=None if hybrid else lambda texts, vectors: db.search_many(
+            table,
+            vectors,
+            metric=metric,
+            limit=5,
+            ef_search=getattr(current_settings, "efSearch", None),
+            probes=getattr(current_settings, "ivfProbes", None),
+        ),
+    )
+    
+    k_documents = []
+    for doc_tuple in retrieval.documents:
+        document = {
+            "id": doc_tuple[0],
+            "title": doc_tuple[1], 
+            "content": doc_tuple[2],
+            SCORE_FIELDS.get(metric, "similarity_percent"): doc_tuple[3]
+        }
+        k_documents.append(document)
+    return k_documents, retrieval.timed_out
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+
 @app.route("/prompt", methods=["POST", "OPTIONS"])
 def prompt_llm():
     if request.method == "OPTIONS":
@@ -242,42 +596,56 @@ def prompt_llm():
     provider = current_settings.llmProvider
     api_key = current_settings.openAiApiKey
     app.logger.info(provider)
-    app.logger.info(api_key)
-    
-    queries = expand_query(
-        query, 
-        expand_to_n=4, 
-        provider=provider, 
-        model_name="", 
-        api_key=api_key if provider == LLMProvider.OpenAI else None
-    )
-    
-    encoded_queries = text_encoder.encode(queries)
-    n_k_documents = [g.db.search("glo_table", vector, metric="cosine", limit=5) for vector in encoded_queries]
-    
-    n_k_documents = [item for sublist in n_k_documents for item in sublist]
-    
-    unique_docs = {}
-    for doc in n_k_documents:
-        doc_id = doc[0]
-        similarity = doc[3]
-        
-        if doc_id not in unique_docs or similarity > unique_docs[doc_id][3]:
-            unique_docs[doc_id] = doc
-    
-    n_k_documents = list(unique_docs.values())
 
-    k_documents_tuples = rerank_documents(query, docs=n_k_documents, top_k=5)
-    
-    k_documents = []
-    for doc_tuple in k_documents_tuples:
-        document = {
-            "id": doc_tuple[0],
-            "title": doc_tuple[1], 
-            "content": doc_tuple[2],
-            "similarity_percent": doc_tuple[3]
-        }
-        k_documents.append(document)
+    db = g.db
+    try:
+        collection = get_collection(db, data.get("collection"), current_settings)
+    except KeyError as e:
+        return jsonify({"status": "error", "message": str(e.args[0])}), 404
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    table = collection["name"]
+
+    scope = f"answer:{db.db_type}:{provider}"
+    threshold = current_settings.semanticCacheThreshold
+    query_vector = collection_manager.encoder(collection).encode(query)[0]
+    cached = semantic_cache.get(scope, table, query, query_vector, threshold)
+
+    if data.get("stream"):
+        def generate():
+            try:
+                if cached is not None:
+                    yield sse_event("docs", cached["docs"])
+                    yield sse_event("token", cached["answer"])
+                    yield sse_event("done", {"cached": True})
+                    return
+                k_documents, timed_out = retrieve_documents(db, query, current_settings, collection, query_vector)
+                yield sse_event("docs", k_documents)
+                tokens = []
+                for token in stream_llm(query, documents=k_documents, provider=provider, model_name="", api_key=api_key):
+                    tokens.append(token)
+                    yield sse_event("token", token)
+                if k_documents and not timed_out:
+                    semantic_cache.put(scope, table, query, {"answer": "".join(tokens), "docs": k_documents}, query_vector)
+                yield sse_event("done", {})
+            except Exception as e:
+                app.logger.error(f"An error occurred while streaming: {e!s}")
+                yield sse_event("error", {"message": str(e)})
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    if cached is not None:
+        return jsonify({**cached, "cached": True}), 200
+
+    try:
+        k_documents, timed_out = retrieve_documents(db, query, current_settings, collection, query_vector)
+    except Exception as e:
+        app.logger.error(f"An error occurred while retrieving documents: {e!s}")
+        return jsonify({"status": "error", "message": str(e)}), 503
     
     answer = call_llm(
         query, 
@@ -286,6 +654,8 @@ def prompt_llm():
         model_name="", 
         api_key=api_key
     )
+    if k_documents and not timed_out:
+        semantic_cache.put(scope, table, query, {"answer": answer, "docs": k_documents}, query_vector)
 
     return jsonify({"answer": answer, "docs": k_documents}), 200
 
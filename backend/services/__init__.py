@@ -1,7 +1,15 @@
-from . import llm_service, search_service, text_service
+from . import chunking_service, collection_service, context_service, embedding_cache, ingest_service, llm_service, reembed_service, retrieval_service, search_service, semantic_cache, text_service
 
 __all__ = [
+    *chunking_service.__all__,
+    *collection_service.__all__,
+    *context_service.__all__,
+    *embedding_cache.__all__,
+    *ingest_service.__all__,
     *llm_service.__all__,
+    *reembed_service.__all__,
+    *retrieval_service.__all__,
     *search_service.__all__,
+    *semantic_cache.__all__,
     *text_service.__all__,
 ]
\ No newline at end of file
@@ -0,0 +1,88 @@
+import os
+import re
+import numpy as np
+
+from services.text_service import TextEncoder, text_encoder
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+class TextChunker:
+    def __init__(self, encoder: TextEncoder, chunk_size: int = 200, overlap: int = 40):
+        self.encoder = encoder
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    @property
+    def window(self) -> int:
+        return max(1, min(self.chunk_size, self.encoder.encoder.max_seq_length - 2))
+
+    def _sentences(self, texts: list[str]) -> tuple[list[str], list[int]]:
+        sentences, owners = [], []
+        for i, text in enumerate(texts):
+            for sentence in SENTENCE_RE.split(text):
+                if sentence:
+                    sentences.append(sentence)
+                    owners.append(i)
+        return sentences, owners
+
+    def _measure(self, sentences: list[str], window: int) -> tuple[list[str], list[int], list[int]]:
+        tokenizer = self.encoder.encoder.tokenizer
+        encoded = tokenizer(sentences, add_special_tokens=False, return_offsets_mapping=True)
+
+        pieces, lengths, origins = [], [], []
+        for idx, (sentence, ids, offsets) in enumerate(zip(sentences, encoded["input_ids"], encoded["offset_mapping"])):
+            if len(ids) <= window:
+                pieces.append(sentence)
+                lengths.append(len(ids))
+                origins.append(idx)
+                continue
+            for start in range(0, len(ids), window):
+                end = min(start + window, len(ids))
+                pieces.append(sentence[offsets[start][0]:offsets[end - 1][1]])
+                lengths.append(end - start)
+                origins.append(idx)
+        return pieces, lengths, origins
+
+    def _pack(self, pieces: list[str], lengths: np.ndarray, window: int, overlap: int) -> list[str]:
+        bounds = np.concatenate(([0], np.cumsum(lengths)))
+        chunks = []
+        start, n = 0, len(pieces)
+        while start < n:
+            end = int(np.searchsorted(bounds, bounds[start] + window, side="right")) - 1
+            end = max(end, start + 1)
+            chunks.append(" ".join(pieces[start:end]))
+            if end >= n:
+                break
+            start = max(int(np.searchsorted(bounds, bounds[end] - overlap, side="left")), start + 1)
+        return chunks
+
+    def chunk_many(self, texts: list[str]) -> list[list[str]]:
+        if not texts:
+            return []
+        window = self.window
+        overlap = min(self.overlap, window // 2)
+
+        sentences, owners = self._sentences(texts)
+        if not sentences:
+            return [[] for _ in texts]
+        pieces, lengths, origins = self._measure(sentences, window)
+
+        piece_owners = np.asarray(owners)[origins]
+        lengths = np.asarray(lengths)
+        splits = np.flatnonzero(np.diff(piece_owners)) + 1
+        starts = np.concatenate(([0], splits))
+        ends = np.concatenate((splits, [len(pieces)]))
+
+        chunks: list[list[str]] = [[] for _ in texts]
+        for start, end in zip(starts, ends):
+            chunks[piece_owners[start]] = self._pack(pieces[start:end], lengths[start:end], window, overlap)
+        return chunks
+
+
+text_chunker = TextChunker(
+    text_encoder,
+    chunk_size=int(os.getenv("CHUNK_SIZE", "200")),
+    overlap=int(os.getenv("CHUNK_OVERLAP", "40")),
+)
+
+__all__ = ["TextChunker", "text_chunker"]
@@ -0,0 +1,125 @@
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+from services.text_service import EncoderRegistry, TextEncoder, encoder_registry
+
+COLLECTION_NAME_RE = re.compile(r"^[a-z_][a-z0-9_]{0,55}$")
+RESERVED_NAMES = frozenset(("vector_tables", "local_tables"))
+
+class _Fence:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._waiting = 0
+        self._writing = False
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            while self._writing or self._waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class CollectionManager:
+    def __init__(self, encoders: EncoderRegistry, default: str = "glo_table"):
+        self.encoders = encoders
+        self.default = default
+        self._records: dict[tuple[str, str], dict] = {}
+        self._fences: dict[tuple[str, str], _Fence] = {}
+        self._lock = threading.Lock()
+
+    def validate_name(self, name: str | None) -> str:
+        name = name or self.default
+        if not COLLECTION_NAME_RE.match(name) or name in RESERVED_NAMES or name.endswith(("_pages", "_shadow")):
+            raise ValueError(f"Invalid collection name: {name!r} (use lowercase letters, digits and underscores)")
+        return name
+
+    def get(self, db, name: str, refresh: bool = False) -> dict | None:
+        key = (db.db_type, name)
+        with self._lock:
+            if not refresh and key in self._records:
+                return self._records[key]
+        collection = db.get_collection(name)
+        with self._lock:
+            if collection is None:
+                self._records.pop(key, None)
+            else:
+                self._records[key] = collection
+        return collection
+
+    def list(self, db) -> list[dict]:
+        return db.list_collections()
+
+    def ensure(self, db, name: str | None, model: str, metric: str = "cosine") -> dict:
+        name = self.validate_name(name)
+        collection = self.get(db, name)
+        if collection is not None and collection.get("model"):
+            db.ensure_vector_table(name, collection["dim"])
+            return collection
+
+        encoder = self.encoders.get(model)
+        db.ensure_vector_table(name, encoder.dimension)
+        db.save_collection(name, encoder.model_name, encoder.dimension, metric)
+        return self.get(db, name, refresh=True)
+
+    def resolve(self, db, name: str | None, model: str, metric: str = "cosine") -> dict:
+        name = self.validate_name(name)
+        collection = self.get(db, name)
+        if collection is not None and collection.get("model"):
+            return collection
+        if collection is None and name != self.default:
+            raise KeyError(f"Unknown collection: {name}")
+        return self.ensure(db, name, model, metric)
+
+    def encoder(self, collection: dict) -> TextEncoder:
+        return self.encoders.get(collection["model"])
+
+    def _fence(self, db, name: str) -> _Fence:
+        with self._lock:
+            return self._fences.setdefault((db.db_type, name), _Fence())
+
+    @contextmanager
+    def writing(self, db, name: str):
+        with self._fence(db, name).shared():
+            yield self.get(db, name)
+
+    @contextmanager
+    def switching(self, db, name: str):
+        with self._fence(db, name).exclusive():
+            yield
+
+    def forget(self, db, name: str):
+        with self._lock:
+            self._records.pop((db.db_type, name), None)
+
+
+collection_manager = CollectionManager(
+    encoder_registry,
+    default=os.getenv("DEFAULT_COLLECTION", "glo_table"),
+)
+
+__all__ = ["CollectionManager", "collection_manager"]
@@ -0,0 +1,103 @@
+import os
+import re
+import threading
+from loguru import logger
+from templates.prompts import RAGPromptTemplate
+from services.text_service import TextEncoder, text_encoder
+
+SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+(?=[\"'„(\[]?[A-ZĄĆĘŁŃÓŚŹŻ0-9])")
+
+class ContextPacker:
+    def __init__(
+        self,
+        budget: int = 12000,
+        encoding: str = "cl100k_base",
+        tokenizer: str | None = None,
+        sentence_model: str | None = None,
+        encoder: TextEncoder | None = None,
+    ):
+        self.budget = budget
+        self.encoding_name = encoding
+        self.tokenizer_name = tokenizer
+        self.encoder = encoder
+        self.sentence_model = sentence_model
+        self._tokenizer = None
+        self._nlp = None
+        self._lock = threading.Lock()
+
+    def _load_tokenizer(self):
+        with self._lock:
+            if self._tokenizer is None:
+                if self.tokenizer_name:
+                    from transformers import AutoTokenizer
+                    tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+                    self._tokenizer = lambda texts: [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+                else:
+                    try:
+                        import tiktoken
+                        encoding = tiktoken.get_encoding(self.encoding_name)
+                        self._tokenizer = lambda texts: [len(ids) for ids in encoding.encode_ordinary_batch(texts)]
+                    except Exception as e:
+                        if self.encoder is None:
+                            raise
+                        logger.warning(f"tiktoken encoding '{self.encoding_name}' unavailable, counting tokens with {self.encoder.model_name}: {e}")
+                        tokenizer = self.encoder.encoder.tokenizer
+                        self._tokenizer = lambda texts: [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+        return self._tokenizer
+
+    def count(self, texts: list[str]) -> list[int]:
+        if not texts:
+            return []
+        return (self._tokenizer or self._load_tokenizer())(texts)
+
+    def sentences(self, text: str) -> list[str]:
+        if self.sentence_model:
+            with self._lock:
+                if self._nlp is None:
+                    import spacy
+                    self._nlp = spacy.load(self.sentence_model, exclude=["ner", "lemmatizer"])
+            return [s.text for s in self._nlp(text).sents]
+        return [s for s in SENTENCE_RE.split(text) if s]
+
+    def _truncate(self, doc: dict, budget: int) -> dict | None:
+        header = self.count([RAGPromptTemplate.format_document({**doc, "content": ""})])[0]
+        sentences = self.sentences(doc.get("content") or "")
+        chosen, used = [], header
+        for sentence, tokens in zip(sentences, self.count(sentences)):
+            if used + tokens + 1 > budget:
+                break
+            chosen.append(sentence)
+            used += tokens + 1
+        if not chosen:
+            return None
+        return {**doc, "content": " ".join(chosen)}
+
+    def pack(self, query: str, documents: list[dict], budget: int | None = None) -> list[dict]:
+        budget = (budget or self.budget) - self.count([RAGPromptTemplate.create_prompt(query, [])])[0]
+        if not documents or budget <= 0:
+            return []
+
+        costs = self.count([RAGPromptTemplate.format_document(doc) for doc in documents])
+
+        packed, remaining = [], budget
+        for doc, cost in zip(documents, costs):
+            if cost + 1 <= remaining:
+                packed.append(doc)
+                remaining -= cost + 1
+                continue
+            truncated = self._truncate(doc, remaining)
+            if truncated is not None:
+                packed.append(truncated)
+            break
+        return packed
+
+
+context_packer = ContextPacker(
+    budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "12000")),
+    encoding=os.getenv("CONTEXT_TIKTOKEN_ENCODING", "cl100k_base"),
+    tokenizer=os.getenv("CONTEXT_TOKENIZER") or None,
+    sentence_model=os.getenv("CONTEXT_SENTENCE_MODEL") or None,
+    encoder=text_encoder,
+)
+
+__all__ = ["ContextPacker", "context_packer"]
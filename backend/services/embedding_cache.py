@@ -0,0 +1,133 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+KEY_LENGTH = 32
+
+class DiskEmbeddingStore:
+    def __init__(self, directory: str, model_name: str, dim: int):
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r"[^\w.-]", "_", model_name)
+        self.vectors_path = os.path.join(directory, f"{slug}.f32")
+        self.keys_path = os.path.join(directory, f"{slug}.keys")
+        self.dim = dim
+        self._index: dict[str, int] = {}
+        self._mmap = None
+        self._load()
+
+    def _load(self):
+        keys = []
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, encoding="utf-8") as f:
+                keys = [line.rstrip("\n") for line in f]
+        row_bytes = self.dim * 4
+        rows = os.path.getsize(self.vectors_path) // row_bytes if os.path.exists(self.vectors_path) else 0
+
+        valid = 0
+        while valid < min(len(keys), rows) and len(keys[valid]) == KEY_LENGTH:
+            valid += 1
+        if valid != len(keys) or valid != rows:
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(valid * row_bytes)
+            with open(self.keys_path, "w", encoding="utf-8") as f:
+                f.writelines(f"{k}\n" for k in keys[:valid])
+
+        self._index = {key: row for row, key in enumerate(keys[:valid])}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _view(self):
+        if self._mmap is None or len(self._mmap) < len(self._index):
+            self._mmap = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(self._index), self.dim))
+        return self._mmap
+
+    def get(self, key: str) -> np.ndarray | None:
+        row = self._index.get(key)
+        if row is None:
+            return None
+        return np.array(self._view()[row])
+
+    def put_many(self, keys: list[str], vectors: np.ndarray):
+        fresh = [i for i, key in enumerate(keys) if key not in self._index]
+        if not fresh:
+            return
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors[fresh], dtype=np.float32).tobytes())
+        with open(self.keys_path, "a", encoding="utf-8") as f:
+            f.writelines(f"{keys[i]}\n" for i in fresh)
+        for i in fresh:
+            self._index[keys[i]] = len(self._index)
+
+
+class EmbeddingCache:
+    def __init__(self, max_entries: int = 10000, directory: str | None = None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.model_name: str | None = None
+        self._memory: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._disk: DiskEmbeddingStore | None = None
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=KEY_LENGTH // 2).hexdigest()
+
+    def set_model(self, model_name: str, dim: int):
+        with self._lock:
+            self.model_name = model_name
+            self._memory.clear()
+            self._disk = DiskEmbeddingStore(self.directory, model_name, dim) if self.directory else None
+
+    def get_many(self, keys: list[str]) -> list[np.ndarray | None]:
+        found = []
+        with self._lock:
+            for key in keys:
+                memory_key = (self.model_name, key)
+                vector = self._memory.get(memory_key)
+                if vector is not None:
+                    self._memory.move_to_end(memory_key)
+                    self._stats["memory_hits"] += 1
+                elif self._disk is not None and (vector := self._disk.get(key)) is not None:
+                    self._remember(memory_key, vector)
+                    self._stats["disk_hits"] += 1
+                else:
+                    self._stats["misses"] += 1
+                found.append(vector)
+        return found
+
+    def put_many(self, keys: list[str], vectors: np.ndarray):
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember((self.model_name, key), vector)
+            if self._disk is not None:
+                self._disk.put_many(keys, vectors)
+
+    def _remember(self, memory_key: tuple[str, str], vector: np.ndarray):
+        self._memory[memory_key] = vector
+        self._memory.move_to_end(memory_key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = sum(self._stats.values())
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            return {
+                **self._stats,
+                "model": self.model_name,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk) if self._disk is not None else None,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+__all__ = ["EmbeddingCache", "DiskEmbeddingStore"]
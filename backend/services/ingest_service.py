@@ -0,0 +1,302 @@
+import os
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+
+from utils.helpers import clean_documents, content_hash
+from services.text_service import text_encoder
+from services.chunking_service import TextChunker, text_chunker
+from services.semantic_cache import semantic_cache
+from services.collection_service import collection_manager
+
+_DONE = object()
+
+class IngestJob:
+    def __init__(self, kind: str, stage_names: list[str], total: int | None = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.total = total
+        self.error: str | None = None
+        self.result: dict = {}
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.stages = {name: {"items": 0, "seconds": 0.0} for name in stage_names}
+        self.final_stage = stage_names[-1] if stage_names else None
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"items": 0, "seconds": 0.0})
+            entry["items"] += 1
+            entry["seconds"] += seconds
+
+    def skip(self):
+        with self._lock:
+            self.skipped += 1
+
+    def update_result(self, **values):
+        with self._lock:
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and isinstance(self.result.get(key), (int, float)):
+                    self.result[key] += value
+                elif isinstance(value, list):
+                    self.result.setdefault(key, []).extend(value)
+                elif isinstance(value, dict):
+                    self.result.setdefault(key, {}).update(value)
+                else:
+                    self.result[key] = value
+
+    def fail(self, error: Exception):
+        with self._lock:
+            if self.error is None:
+                self.error = str(error)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            done = (self.stages[self.final_stage]["items"] if self.final_stage else 0) + self.skipped
+            end = self.finished_at or time.time()
+            elapsed = end - self.started_at if self.started_at else 0.0
+            eta = None
+            if self.status == "running" and self.total and done:
+                eta = round(elapsed / done * max(self.total - done, 0), 1)
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "error": self.error,
+                "progress": {"done": done, "skipped": self.skipped, "total": self.total, "eta_seconds": eta},
+                "elapsed_seconds": round(elapsed, 3),
+                "stages": {
+                    name: {"items": stage["items"], "seconds": round(stage["seconds"], 3)}
+                    for name, stage in self.stages.items()
+                },
+                "result": dict(self.result),
+            }
+
+
+class JobManager:
+    def __init__(self, max_workers: int = 2, queue_size: int = 8, max_jobs: int = 500):
+        self.queue_size = queue_size
+        self.max_jobs = max_jobs
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs: OrderedDict[str, IngestJob] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        kind: str,
+        source: Iterable | Callable[[IngestJob], Iterable],
+        stages: list[tuple[str, Callable]],
+        total: int | None = None,
+        on_finish: Callable[[IngestJob], None] | None = None,
+    ) -> IngestJob:
+        job = IngestJob(kind, [name for name, _ in stages], total=total)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        self.executor.submit(self._run, job, source, stages, on_finish)
+        return job
+
+    def get(self, job_id: str) -> IngestJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list[IngestJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _run(self, job: IngestJob, source: Iterable, stages: list[tuple[str, Callable]], on_finish: Callable | None):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            self._run_pipeline(job, source, stages)
+        except Exception as e:
+            job.fail(e)
+        finally:
+            if on_finish is not None:
+                try:
+                    on_finish(job)
+                except Exception as e:
+                    logger.warning(f"Job {job.id} cleanup failed: {e}")
+            job.finished_at = time.time()
+            job.status = "failed" if job.error else "completed"
+            logger.info(f"Job {job.id} ({job.kind}) {job.status} in {job.finished_at - job.started_at:.2f}s")
+
+    def _run_pipeline(self, job: IngestJob, source: Iterable, stages: list[tuple[str, Callable]]):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in stages]
+        stop = threading.Event()
+
+        def work(index: int, name: str, fn: Callable):
+            inbox = queues[index]
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    break
+                if stop.is_set():
+                    continue
+                start = time.perf_counter()
+                try:
+                    out = fn(job, item)
+                except Exception as e:
+                    logger.error(f"Job {job.id} stage '{name}' failed: {e}")
+                    job.fail(e)
+                    stop.set()
+                    continue
+                job.record(name, time.perf_counter() - start)
+                if outbox is not None and out is not None:
+                    outbox.put(out)
+            if outbox is not None:
+                outbox.put(_DONE)
+
+        workers = [
+            threading.Thread(target=work, args=(i, name, fn), name=f"ingest-{job.id[:8]}-{name}", daemon=True)
+            for i, (name, fn) in enumerate(stages)
+        ]
+        for worker in workers:
+            worker.start()
+        if callable(source):
+            source = source(job)
+        try:
+            for item in source:
+                if stop.is_set():
+                    break
+                queues[0].put(item)
+        finally:
+            if hasattr(source, "close"):
+                source.close()
+            queues[0].put(_DONE)
+            for worker in workers:
+                worker.join()
+
+
+def document_stages(db, table: str, chunk_size: int = 1000, incremental: bool = False, encoder=None) -> list[tuple[str, Callable]]:
+    encoder = encoder or text_encoder
+    chunker = text_chunker if encoder is text_chunker.encoder else TextChunker(encoder, text_chunker.chunk_size, text_chunker.overlap)
+
+    def clean(job: IngestJob, batch: dict) -> dict:
+        contents = clean_documents([d["text"] for d in batch["docs"]])
+        docs = [
+            {**d, "text": text, "content_hash": content_hash(d.get("title"), text), "section_index": i}
+            for i, (d, text) in enumerate(zip(batch["docs"], contents))
+            if text
+        ]
+        return {**batch, "docs": docs}
+
+    def diff(job: IngestJob, batch: dict) -> dict:
+        page_url = batch.get("page_url")
+        if not page_url:
+            return batch
+        existing = db.get_section_hashes(table, page_url)
+        fresh, seen = [], set()
+        for d in batch["docs"]:
+            if d["content_hash"] in seen:
+                continue
+            seen.add(d["content_hash"])
+            if existing.pop(d["content_hash"], None) is None:
+                fresh.append(d)
+        stale = [doc_id for ids in existing.values() for doc_id in ids]
+        job.update_result(unchanged=len(seen) - len(fresh), removed=len(stale))
+        return {**batch, "docs": fresh, "stale_ids": stale}
+
+    def chunk(job: IngestJob, batch: dict) -> dict:
+        chunks = chunker.chunk_many([d["text"] for d in batch["docs"]])
+        docs = [
+            {**d, "text": text, "chunk_index": i}
+            for d, section_chunks in zip(batch["docs"], chunks)
+            for i, text in enumerate(section_chunks)
+        ]
+        job.update_result(chunks=len(docs))
+        return {**batch, "docs": docs}
+
+    def embed(job: IngestJob, batch: dict) -> dict:
+        return {**batch, "vectors": encoder.encode([d["text"] for d in batch["docs"]])}
+
+    def insert(job: IngestJob, batch: dict) -> dict:
+        docs = batch["docs"]
+        with collection_manager.writing(db, table) as collection:
+            vectors = batch["vectors"]
+            if docs and collection is not None and collection.get("model") not in (None, encoder.model_name):
+                vectors = collection_manager.encoder(collection).encode([d["text"] for d in docs])
+            rows = (
+                {
+                    "title": d.get("title"),
+                    "content": d["text"],
+                    "page_url": d.get("page_url"),
+                    "content_hash": d["content_hash"],
+                    "section_index": d.get("section_index"),
+                    "chunk_index": d.get("chunk_index"),
+                    "embedding": vector,
+                }
+                for d, vector in zip(docs, vectors)
+            )
+            ingest = db.bulk_add_documents(table, rows, chunk_size=chunk_size) if docs else {"rows": 0}
+            db.remove_documents(table, batch.get("stale_ids", []))
+            if batch.get("validators") is not None:
+                db.save_page_validators(
+                    table,
+                    batch["page_url"],
+                    batch["validators"]["etag"],
+                    batch["validators"]["last_modified"],
+                    batch.get("links"),
+                )
+        if ingest["rows"] or batch.get("stale_ids"):
+            semantic_cache.invalidate(table)
+        job.update_result(rows=ingest["rows"], titles=list(dict.fromkeys(d.get("title") for d in docs)))
+        return ingest
+
+    stages = [("clean", clean), ("chunk", chunk), ("embed", embed), ("insert", insert)]
+    if incremental:
+        stages.insert(1, ("diff", diff))
+    return stages
+
+
+def crawl_source(site_crawler, seeds: list[str]) -> Callable[[IngestJob], Iterable]:
+    def pages(job: IngestJob):
+        fetched = 0
+        for page in site_crawler.crawl(seeds):
+            fetched += 1
+            job.record("fetch", page.seconds)
+            job.update_result(strategies={page.url: page.strategy}, pages=1)
+            if page.html is None:
+                job.update_result(unchanged_pages=1)
+                job.skip()
+                continue
+            yield {
+                "page_url": page.url,
+                "html": page.html,
+                "validators": {"etag": page.etag, "last_modified": page.last_modified},
+                "links": page.links,
+            }
+        if site_crawler.failed:
+            job.update_result(failed=list(site_crawler.failed))
+            if not fetched:
+                raise RuntimeError(f"Failed to fetch {', '.join(site_crawler.failed)}")
+
+    return pages
+
+
+def crawl_stages(db, table: str, parser, chunk_size: int = 1000, incremental: bool = True, encoder=None) -> list[tuple[str, Callable]]:
+    def parse(job: IngestJob, page: dict) -> dict:
+        sections = parser.extract_sections(page["html"], page["page_url"])
+        logger.info(f"Znaleziono sekcji: {len(sections)}")
+        return {"page_url": page["page_url"], "validators": page["validators"], "docs": sections}
+
+    return [("parse", parse), *document_stages(db, table, chunk_size, incremental=incremental, encoder=encoder)]
+
+
+job_manager = JobManager(
+    max_workers=int(os.getenv("INGEST_WORKERS", "2")),
+    queue_size=int(os.getenv("INGEST_QUEUE_SIZE", "8")),
+)
+
+__all__ = ["IngestJob", "JobManager", "job_manager", "document_stages", "crawl_stages", "crawl_source"]
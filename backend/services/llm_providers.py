@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from typing import Optional
 import os
 import requests
 import json
+import hashlib
+import threading
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
 from loguru import logger
 
 from langchain_ollama import OllamaLLM
@@ -20,6 +25,19 @@ class LLMProvider(ABC):
     def invoke(self, prompt: str) -> str:
         pass
 
+    @abstractmethod
+    def stream(self, prompt: str) -> Iterator[str]:
+        pass
+
+
+def _chunk_text(chunk) -> str:
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+    return ""
+
 
 class DomdataProvider(LLMProvider):
     def __init__(self, model_name: str = "domdata", temperature: float = 0.0, api_key: Optional[str] = None):
@@ -32,20 +50,27 @@ class DomdataProvider(LLMProvider):
         self.url = os.getenv("DOMDATA_MODEL_URL")
         if not self.url:
             raise ValueError("API key required")
-        
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=int(os.getenv("LLM_HTTP_POOL_SIZE", "10")))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
     @staticmethod
-    def parse_streaming_response(response):
-        collected_chunks = []
+    def iter_streaming_chunks(response) -> Iterator[str]:
         for line in response.iter_lines(decode_unicode=True):
             line_str = line.strip()
             if line_str.startswith("data: "):
                 data_str = line_str[len("data: "):]
                 data_json = json.loads(data_str)
                 if "chunks" in data_json:
-                    collected_chunks.append(data_json["chunks"])
-        return "".join(collected_chunks)
-        
-    def invoke(self, prompt: str) -> str:
+                    yield data_json["chunks"]
+
+    @staticmethod
+    def parse_streaming_response(response):
+        return "".join(DomdataProvider.iter_streaming_chunks(response))
+
+    def _request(self, prompt: str):
         headers = {
             "accept": "application/json",
             "Authorization": f"Bearer {self.key}",
@@ -102,12 +127,19 @@ class DomdataProvider(LLMProvider):
                 }
             }
         }
+        return self.session.post(self.url, headers=headers, json=payload, stream=True)
+
+    def invoke(self, prompt: str) -> str:
         try:
-            response = requests.post(self.url, headers=headers, json=payload, stream=True)
+            response = self._request(prompt)
             return self.parse_streaming_response(response)
         except Exception as e:
             logger.info("ERROR: ", e)
 
+    def stream(self, prompt: str) -> Iterator[str]:
+        with self._request(prompt) as response:
+            yield from self.iter_streaming_chunks(response)
+
 
 class OllamaProvider(LLMProvider):
     def __init__(self, model_name: str = "jobautomation/OpenEuroLLM-Polish", temperature: float = 0.0):
@@ -117,6 +149,10 @@ class OllamaProvider(LLMProvider):
     def invoke(self, prompt: str) -> str:
         return self.model.invoke(prompt)
 
+    def stream(self, prompt: str) -> Iterator[str]:
+        for chunk in self.model.stream(prompt):
+            yield _chunk_text(chunk)
+
 
 class OpenAIProvider(LLMProvider):    
     def __init__(self, model_name: str = "gpt-4o-mini", temperature: float = 0.0, api_key: Optional[str] = None):
@@ -132,6 +168,12 @@ class OpenAIProvider(LLMProvider):
         response = self.model.invoke(prompt)
         return response.content
 
+    def stream(self, prompt: str) -> Iterator[str]:
+        for chunk in self.model.stream(prompt):
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+
 
 class GeminiProvider(LLMProvider):
     def __init__(self, model_name: str = "gemini-1.5-flash", temperature: float = 0.0, api_key: Optional[str] = None):
@@ -147,6 +189,12 @@ class GeminiProvider(LLMProvider):
         response = self.model.invoke(prompt)
         return response.content
 
+    def stream(self, prompt: str) -> Iterator[str]:
+        for chunk in self.model.stream(prompt):
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+
 
 def get_llm_provider(provider_type: str, model_name: Optional[str] = None, temperature: float = 0.0, api_key: Optional[str] = None) -> LLMProvider:
     provider_type = provider_type.lower()
@@ -171,4 +219,54 @@ def get_llm_provider(provider_type: str, model_name: Optional[str] = None, tempe
         raise ValueError(f"Unsupported provider: {provider_type}. Choose from: ollama, openai, gemini")
 
 
-__all__ = ["LLMProvider", "OllamaProvider", "OpenAIProvider", "GeminiProvider", "get_llm_provider"]
+class ProviderRegistry:
+    def __init__(self, max_size: int = 16):
+        self.max_size = max_size
+        self._providers: OrderedDict[tuple, LLMProvider] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _fingerprint(api_key: Optional[str]) -> Optional[str]:
+        if not api_key:
+            return None
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+    def get(self, provider_type: str, model_name: Optional[str] = None, temperature: float = 0.0, api_key: Optional[str] = None) -> LLMProvider:
+        key = (provider_type.lower(), model_name or "", float(temperature), self._fingerprint(api_key))
+        with self._lock:
+            provider = self._providers.get(key)
+            if provider is not None:
+                self._providers.move_to_end(key)
+                self._stats["hits"] += 1
+                return provider
+            self._stats["misses"] += 1
+
+        provider = get_llm_provider(provider_type, model_name, temperature=temperature, api_key=api_key)
+        with self._lock:
+            self._providers[key] = provider
+            while len(self._providers) > self.max_size:
+                self._providers.popitem(last=False)
+        return provider
+
+    def clear(self):
+        with self._lock:
+            self._providers.clear()
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "cached": len(self._providers)}
+
+
+provider_registry = ProviderRegistry()
+
+__all__ = [
+    "LLMProvider",
+    "OllamaProvider",
+    "OpenAIProvider",
+    "GeminiProvider",
+    "get_llm_provider",
+    "ProviderRegistry",
+    "provider_registry",
+]
@@ -1,12 +1,16 @@
 import re
+from collections.abc import Iterator
 from typing import Optional
 from templates.prompts import QueryExpansionTemplate, RAGPromptTemplate
-from services.llm_providers import get_llm_provider
-import spacy
+from services.llm_providers import provider_registry
+from services.context_service import context_packer
 from loguru import logger
 
-nlp = spacy.load("pl_core_news_md")
-WORD_RE = re.compile(r"\b\w+\b", re.UNICODE)
+def _clean_expansion(content: str, query: str) -> str | None:
+    cleaned = re.sub(r"^\d+\.\s*", "", content.strip()).strip()
+    if cleaned and cleaned != query:
+        return cleaned
+    return None
 
 def expand_query(
     query: str,
@@ -18,7 +22,7 @@ def expand_query(
     query_expansion_template = QueryExpansionTemplate()
     prompt_template = query_expansion_template.create_template(expand_to_n - 1)
 
-    llm = get_llm_provider(provider, model_name, temperature=0.0, api_key=api_key)
+    llm = provider_registry.get(provider, model_name, temperature=0.0, api_key=api_key)
 
     prompt_text = prompt_template.format(question=query)
     response = llm.invoke(prompt_text)
@@ -27,41 +31,42 @@ def expand_query(
     queries = [query]
 
     for content in queries_content:
-        stripped_content = content.strip()
-        if stripped_content:
-            cleaned = re.sub(r"^\d+\.\s*", "", stripped_content)
-            cleaned = cleaned.strip()
-            if cleaned and cleaned != query:
-                queries.append(cleaned)
+        cleaned = _clean_expansion(content, query)
+        if cleaned:
+            queries.append(cleaned)
 
     return queries
 
-def count_words(t):
-    return len(WORD_RE.findall(t))
-
-def trim_to_last_full_sentences(text, limit=15000):
-    if count_words(text) <= limit:
-        return text
-
-    doc = nlp(text)
-    sents = [s.text for s in doc.sents]
-
-    total = 0
-    chosen = []
-    for s in sents:
-        wc = count_words(s)
-        if total + wc <= limit:
-            chosen.append(s)
-            total += wc
-        else:
-            break
-
-    if not chosen:
-        first = sents[0]
-        words = WORD_RE.findall(first)
-        return " ".join(words[:limit])
+def stream_expanded_queries(
+    query: str,
+    expand_to_n: int,
+    provider: str = "ollama",
+    model_name: Optional[str] = None,
+    api_key: Optional[str] = None,
+) -> Iterator[str]:
+    query_expansion_template = QueryExpansionTemplate()
+    separator = query_expansion_template.separator
+    prompt_template = query_expansion_template.create_template(expand_to_n - 1)
 
-    return " ".join(chosen)
+    llm = provider_registry.get(provider, model_name, temperature=0.0, api_key=api_key)
+
+    buffer = ""
+    tokens = llm.stream(prompt_template.format(question=query))
+    try:
+        for token in tokens:
+            buffer += token
+            while separator in buffer:
+                content, buffer = buffer.split(separator, 1)
+                cleaned = _clean_expansion(content, query)
+                if cleaned:
+                    yield cleaned
+    finally:
+        close = getattr(tokens, "close", None)
+        if close is not None:
+            close()
+    cleaned = _clean_expansion(buffer, query)
+    if cleaned:
+        yield cleaned
 
 def call_llm(
     query: str,
@@ -69,15 +74,27 @@ def call_llm(
     provider: str = "ollama",
     model_name: Optional[str] = None,
     api_key: Optional[str] = None,
-    limit: int = 15000,
+    limit: Optional[int] = None,
 ) -> str:
-    llm = get_llm_provider(provider, model_name, temperature=0.0, api_key=api_key)
-    prompt = RAGPromptTemplate.create_prompt(query, documents)
+    llm = provider_registry.get(provider, model_name, temperature=0.0, api_key=api_key)
+    prompt = RAGPromptTemplate.create_prompt(query, context_packer.pack(query, documents, budget=limit))
 
-    trimmed_prompt = trim_to_last_full_sentences(text=prompt, limit=limit)
-    response = llm.invoke(trimmed_prompt)
+    response = llm.invoke(prompt)
 
     return response
 
+def stream_llm(
+    query: str,
+    documents: list[dict],
+    provider: str = "ollama",
+    model_name: Optional[str] = None,
+    api_key: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Iterator[str]:
+    llm = provider_registry.get(provider, model_name, temperature=0.0, api_key=api_key)
+    prompt = RAGPromptTemplate.create_prompt(query, context_packer.pack(query, documents, budget=limit))
+
+    yield from llm.stream(prompt)
+
 
-__all__ = ["expand_query", "call_llm"]
+__all__ = ["expand_query", "stream_expanded_queries", "call_llm", "stream_llm"]
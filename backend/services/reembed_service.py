@@ -0,0 +1,177 @@
+import os
+import math
+import time
+import threading
+from loguru import logger
+
+from services.collection_service import CollectionManager, collection_manager
+from services.ingest_service import IngestJob, JobManager, job_manager
+from services.semantic_cache import semantic_cache
+
+class Throttle:
+    def __init__(self, max_rows_per_sec: float | None = None, pressure_pause: float = 0.5, max_pauses: int = 20):
+        self.max_rows_per_sec = max_rows_per_sec
+        self.pressure_pause = pressure_pause
+        self.max_pauses = max_pauses
+        self._start = time.monotonic()
+        self._rows = 0
+
+    @staticmethod
+    def _under_pressure(db) -> bool:
+        stats = db.pool_stats()
+        if not stats:
+            return False
+        return stats.get("pool_available", 1) == 0 and stats.get("pool_size", 0) >= stats.get("pool_max", 0)
+
+    def wait(self, db, rows: int) -> float:
+        waited = 0.0
+        if self.max_rows_per_sec:
+            self._rows += rows
+            delay = self._rows / self.max_rows_per_sec - (time.monotonic() - self._start)
+            if delay > 0:
+                time.sleep(delay)
+                waited += delay
+        for _ in range(self.max_pauses):
+            if not self._under_pressure(db):
+                break
+            time.sleep(self.pressure_pause)
+            waited += self.pressure_pause
+        return waited
+
+
+class Reembedder:
+    def __init__(
+        self,
+        collections: CollectionManager,
+        jobs: JobManager,
+        page_size: int = 1000,
+        batch_size: int = 256,
+        max_rows_per_sec: float | None = None,
+        pressure_pause: float = 0.5,
+    ):
+        self.collections = collections
+        self.jobs = jobs
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.max_rows_per_sec = max_rows_per_sec
+        self.pressure_pause = pressure_pause
+        self._active: dict[tuple[str, str], IngestJob] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shadow_name(table: str) -> str:
+        return f"{table}_shadow"
+
+    def active(self, db, table: str) -> IngestJob | None:
+        with self._lock:
+            job = self._active.get((db.db_type, table))
+        return job if job is not None and job.status in ("queued", "running") else None
+
+    @staticmethod
+    def _rebuild_indexes(db, collection: dict, shadow: str):
+        index_params = collection.get("index_params") or {}
+        quantization = collection.get("quantization") or "none"
+        if quantization != "none":
+            options = next((options for options in index_params.values() if options.get("quantization")), {})
+            db.set_quantization(
+                shadow,
+                quantization,
+                metric=options.get("metric", collection["metric"]),
+                m=options.get("m", 16),
+                ef_construction=options.get("ef_construction", 64),
+            )
+        for options in index_params.values():
+            if options.get("quantization"):
+                continue
+            db.create_index(
+                shadow,
+                method=options.get("method", "hnsw"),
+                metric=options.get("metric", collection["metric"]),
+                **{key: options[key] for key in ("m", "ef_construction", "lists") if key in options},
+            )
+
+    def start(self, db, name: str | None, model: str) -> IngestJob:
+        collection = self.collections.get(db, self.collections.validate_name(name), refresh=True)
+        if collection is None:
+            raise KeyError(f"Unknown collection: {name}")
+        table = collection["name"]
+        key = (db.db_type, table)
+        with self._lock:
+            running = self._active.get(key)
+            if running is not None and running.status in ("queued", "running"):
+                return running
+
+            encoder = self.collections.encoders.get(model)
+            shadow = self.shadow_name(table)
+            db.drop_table(shadow)
+            db.create_vector_table(shadow, encoder.dimension)
+            total_rows = db.count_rows(table)
+            throttle = Throttle(self.max_rows_per_sec, self.pressure_pause)
+
+            def pages(job: IngestJob):
+                job.update_result(
+                    collection=table,
+                    previous_model=collection["model"],
+                    model=encoder.model_name,
+                    total_rows=total_rows,
+                    rows=0,
+                    phase="copying",
+                )
+                after_id = 0
+                while rows := db.fetch_rows(table, after_id, self.page_size):
+                    after_id = rows[-1]["id"]
+                    waited = throttle.wait(db, len(rows))
+                    if waited:
+                        job.update_result(throttled_seconds=round(waited, 3))
+                    yield rows
+
+            def encode(rows: list[dict]) -> list[dict]:
+                vectors = encoder.encode([row["content"] or "" for row in rows], batch_size=self.batch_size)
+                return [{**row, "embedding": vector} for row, vector in zip(rows, vectors)]
+
+            def embed(job: IngestJob, rows: list[dict]) -> list[dict]:
+                return encode(rows)
+
+            def insert(job: IngestJob, rows: list[dict]):
+                db.bulk_add_documents(shadow, rows, chunk_size=len(rows))
+                job.update_result(rows=len(rows))
+
+            def finish(job: IngestJob):
+                try:
+                    if job.error is None:
+                        job.update_result(phase="indexing")
+                        self._rebuild_indexes(db, collection, shadow)
+                        job.update_result(phase="switching")
+                        with self.collections.switching(db, table):
+                            switch = db.replace_table(table, shadow, encode, encoder.model_name, encoder.dimension, collection["metric"])
+                            self.collections.forget(db, table)
+                            semantic_cache.invalidate(table)
+                        job.update_result(phase="done", **switch)
+                        return
+                except Exception as e:
+                    logger.error(f"Re-embedding {table} failed while switching over: {e}")
+                    job.fail(e)
+                job.update_result(phase="aborted")
+                db.drop_table(shadow)
+
+            job = self.jobs.submit(
+                "reembed",
+                pages,
+                [("embed", embed), ("insert", insert)],
+                total=math.ceil(total_rows / self.page_size),
+                on_finish=finish,
+            )
+            self._active[key] = job
+        return job
+
+
+reembedder = Reembedder(
+    collection_manager,
+    job_manager,
+    page_size=int(os.getenv("REEMBED_PAGE_SIZE", "1000")),
+    batch_size=int(os.getenv("REEMBED_BATCH_SIZE", "256")),
+    max_rows_per_sec=float(os.getenv("REEMBED_MAX_ROWS_PER_SEC", "0")) or None,
+    pressure_pause=float(os.getenv("REEMBED_PRESSURE_PAUSE", "0.5")),
+)
+
+__all__ = ["Reembedder", "reembedder"]
@@ -0,0 +1,169 @@
+import os
+import time
+import queue
+import threading
+from typing import NamedTuple
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+
+from services.text_service import TextEncoder, text_encoder
+from services.search_service import Reranker, reranker
+
+class Retrieval(NamedTuple):
+    documents: list[tuple]
+    timed_out: bool
+
+
+class ConcurrentRetriever:
+    def __init__(self, encoder: TextEncoder, reranker: Reranker, max_workers: int = 16, deadline: float = 3.0):
+        self.encoder = encoder
+        self.reranker = reranker
+        self.deadline = deadline
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrieval")
+        self._lock = threading.Lock()
+        self._metrics = {"calls": 0, "deadline_hits": 0, "searches": 0, "total_seconds": 0.0}
+
+    def retrieve(
+        self,
+        query: str,
+        search: Callable,
+        expansions: Iterable[str],
+        query_vector=None,
+        top_k: int = 5,
+        deadline: float | None = None,
+        on_expanded: Callable[[list[str]], None] | None = None,
+        encoder: TextEncoder | None = None,
+        higher_is_better: bool = True,
+        search_many: Callable | None = None,
+    ) -> Retrieval:
+        encoder = encoder or self.encoder
+        start = time.monotonic()
+        budget = self.deadline if deadline is None else deadline
+        expand_deadline_at, search_deadline_at = start + budget, None
+        events = queue.Queue()
+        cancelled = threading.Event()
+
+        def run_search(text, vector, original=False):
+            try:
+                events.put(("hits", search(text, vector)))
+            except Exception as e:
+                events.put(("error", (e, original)))
+
+        def run_search_many(texts, vectors):
+            try:
+                events.put(("hits", [doc for hits in search_many(texts, vectors) for doc in hits]))
+            except Exception as e:
+                events.put(("error", (e, False)))
+
+        def expand():
+            queries = [query]
+            try:
+                if search_many is not None and isinstance(expansions, (list, tuple)):
+                    if expansions:
+                        queries.extend(expansions)
+                        events.put(("submitted", None))
+                        self.executor.submit(run_search_many, list(expansions), encoder.encode(list(expansions)))
+                else:
+                    for expanded in expansions:
+                        if cancelled.is_set():
+                            return
+                        queries.append(expanded)
+                        vector = encoder.encode(expanded)[0]
+                        events.put(("submitted", None))
+                        self.executor.submit(run_search, expanded, vector)
+                if on_expanded is not None:
+                    on_expanded(queries)
+            except Exception as e:
+                logger.warning(f"Query expansion failed, using the original query only: {e}")
+            finally:
+                close = getattr(expansions, "close", None)
+                if close is not None:
+                    close()
+                events.put(("expanded", None))
+
+        if query_vector is None:
+            query_vector = encoder.encode(query)[0]
+        self.executor.submit(run_search, query, query_vector, True)
+        threading.Thread(target=expand, name="retrieval-expand", daemon=True).start()
+
+        outstanding, expanding, searches = 1, True, 0
+        best: dict = {}
+        scores: dict = {}
+        timed_out = original_failed = False
+        failure = None
+        while outstanding or expanding:
+            if search_deadline_at is not None:
+                timeout = search_deadline_at - time.monotonic()
+            elif searches:
+                timeout = expand_deadline_at - time.monotonic()
+            else:
+                timeout = None
+            if timeout is not None and timeout <= 0:
+                timed_out = True
+                break
+            try:
+                kind, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                timed_out = True
+                break
+
+            if kind == "submitted":
+                outstanding += 1
+                if search_deadline_at is None:
+                    search_deadline_at = time.monotonic() + budget
+            elif kind == "expanded":
+                expanding = False
+            elif kind == "error":
+                outstanding -= 1
+                error, original = payload
+                logger.warning(f"Retrieval search failed: {error}")
+                if original:
+                    failure, original_failed = error, True
+                    break
+                failure = failure or error
+            else:
+                outstanding -= 1
+                searches += 1
+                fresh = [doc for doc in payload if doc[0] not in best]
+                for doc in payload:
+                    if doc[0] not in best or (doc[3] > best[doc[0]][3]) == higher_is_better:
+                        best[doc[0]] = doc
+                scores.update(zip((doc[0] for doc in fresh), self.reranker.score(query, [doc[2] for doc in fresh])))
+
+        if timed_out or original_failed or not searches:
+            cancelled.set()
+
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self._metrics["calls"] += 1
+            self._metrics["searches"] += searches
+            self._metrics["deadline_hits"] += int(timed_out)
+            self._metrics["total_seconds"] += elapsed
+
+        if original_failed or (failure is not None and not searches):
+            raise RuntimeError(f"Retrieval failed: {failure}") from failure
+        if not searches:
+            raise TimeoutError(f"Retrieval timed out after {elapsed:.2f}s without any search results")
+
+        ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return Retrieval([best[doc_id] for doc_id in ranked], timed_out)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            calls = self._metrics["calls"]
+            return {
+                **self._metrics,
+                "deadline": self.deadline,
+                "avg_seconds": self._metrics["total_seconds"] / calls if calls else 0.0,
+            }
+
+
+retriever = ConcurrentRetriever(
+    text_encoder,
+    reranker,
+    max_workers=int(os.getenv("RETRIEVAL_WORKERS", "16")),
+    deadline=float(os.getenv("RETRIEVAL_DEADLINE", "3.0")),
+)
+
+__all__ = ["ConcurrentRetriever", "Retrieval", "retriever"]
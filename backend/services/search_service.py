@@ -1,18 +1,62 @@
+import os
+import time
+import threading
 from sentence_transformers import CrossEncoder
 
-def rerank_documents(query: str, docs: list[tuple], top_k: int) -> list[tuple]:
-    model = CrossEncoder(model_name_or_path="cross-encoder/ms-marco-MiniLM-L-6-v2")
+class Reranker:
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", batch_size: int = 32):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = CrossEncoder(model_name_or_path=model_name)
+        self._lock = threading.Lock()
+        self._metrics = {"calls": 0, "pairs": 0, "total_seconds": 0.0, "last_seconds": 0.0}
+
+    def update_model(self, new_model_name: str):
+        if new_model_name != self.model_name:
+            try:
+                self.model = CrossEncoder(model_name_or_path=new_model_name)
+                self.model_name = new_model_name
+            except Exception as e:
+                raise Exception(f"Failed to load reranker '{new_model_name}': {str(e)}")
+
+    def score(self, query: str, contents: list[str]) -> list[float]:
+        if not contents:
+            return []
+        start = time.perf_counter()
+        scores = self.model.predict([(query, content) for content in contents], batch_size=self.batch_size)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._metrics["calls"] += 1
+            self._metrics["pairs"] += len(contents)
+            self._metrics["total_seconds"] += elapsed
+            self._metrics["last_seconds"] = elapsed
+        return scores.tolist()
 
-    query_doc_tuples = [(query, doc[2]) for doc in docs]
-    scores = model.predict(query_doc_tuples)
+    def rerank(self, query: str, docs: list[tuple], top_k: int) -> list[tuple]:
+        scores = self.score(query, [doc[2] for doc in docs])
 
-    scored_query_doc_tuples = list(zip(scores, docs, strict=False))
-    scored_query_doc_tuples.sort(key=lambda x: x[0], reverse=True)
+        scored_query_doc_tuples = list(zip(scores, docs, strict=False))
+        scored_query_doc_tuples.sort(key=lambda x: x[0], reverse=True)
 
-    reranked_documents = scored_query_doc_tuples[:top_k]
-    reranked_documents = [doc for _, doc in reranked_documents]
+        reranked_documents = scored_query_doc_tuples[:top_k]
+        return [doc for _, doc in reranked_documents]
 
-    return reranked_documents
+    def metrics(self) -> dict:
+        with self._lock:
+            calls = self._metrics["calls"]
+            return {
+                **self._metrics,
+                "model": self.model_name,
+                "batch_size": self.batch_size,
+                "avg_seconds": self._metrics["total_seconds"] / calls if calls else 0.0,
+            }
+
+
+reranker = Reranker(batch_size=int(os.getenv("RERANKER_BATCH_SIZE", "32")))
+
+def rerank_documents(query: str, docs: list[tuple], top_k: int) -> list[tuple]:
+    return reranker.rerank(query, docs, top_k)
 
 
-__all__ = ["rerank_documents"]
+__all__ = ["Reranker", "reranker", "rerank_documents"]
@@ -0,0 +1,106 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+class SemanticCache:
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600.0, threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries: OrderedDict[tuple, dict] = OrderedDict()
+        self._matrix: dict[tuple, tuple[list[tuple], np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        return WHITESPACE_RE.sub(" ", prompt).strip().strip("?!. ").lower()
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if now - entry["created_at"] > self.ttl]
+        for key in expired:
+            self._drop(key)
+
+    def _drop(self, key: tuple):
+        self._entries.pop(key, None)
+        self._matrix.pop(key[:2], None)
+
+    def _candidates(self, scope: tuple) -> tuple[list[tuple], np.ndarray]:
+        if scope not in self._matrix:
+            keys = [key for key, entry in self._entries.items() if key[:2] == scope and entry["vector"] is not None]
+            vectors = np.stack([self._entries[key]["vector"] for key in keys]) if keys else np.empty((0, 0), dtype=np.float32)
+            self._matrix[scope] = (keys, vectors)
+        return self._matrix[scope]
+
+    def get(self, namespace: str, table: str | None, prompt: str, vector=None, threshold: float | None = None):
+        threshold = self.threshold if threshold is None else threshold
+        key = (namespace, table, self.normalize(prompt))
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return entry["value"]
+
+            if vector is not None:
+                keys, vectors = self._candidates((namespace, table))
+                if keys:
+                    scores = vectors @ self._unit(vector)
+                    best = int(np.argmax(scores))
+                    if scores[best] >= threshold:
+                        self._entries.move_to_end(keys[best])
+                        self._stats["semantic_hits"] += 1
+                        return self._entries[keys[best]]["value"]
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, namespace: str, table: str | None, prompt: str, value, vector=None):
+        key = (namespace, table, self.normalize(prompt))
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = {
+                "value": value,
+                "vector": self._unit(vector) if vector is not None else None,
+                "created_at": time.monotonic(),
+            }
+            self._matrix.pop(key[:2], None)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def invalidate(self, table: str):
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == table]:
+                self._drop(key)
+            self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "threshold": self.threshold}
+
+
+semantic_cache = SemanticCache(
+    max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+)
+
+__all__ = ["SemanticCache", "semantic_cache"]
@@ -1,24 +1,155 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
+from services.embedding_cache import EmbeddingCache
 
-class TextEncoder:    
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+class TextEncoder:
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        batch_size: int = 64,
+        normalize: bool = False,
+        num_threads: int | None = None,
+        cache: EmbeddingCache | None = None,
+    ):
         self.model_name = model_name
+        self.batch_size = batch_size
+        self.normalize = normalize
+        if num_threads:
+            torch.set_num_threads(num_threads)
         self.encoder = SentenceTransformer(model_name)
-    
+        self.cache = cache
+        if self.cache is not None:
+            self.cache.set_model(model_name, self.dimension)
+
     def update_model(self, new_model_name: str):
         if new_model_name != self.model_name:
             try:
                 self.model_name = new_model_name
                 self.encoder = SentenceTransformer(new_model_name)
+                if self.cache is not None:
+                    self.cache.set_model(new_model_name, self.dimension)
             except Exception as e:
                 raise Exception(f"Failed to load model '{new_model_name}': {str(e)}")
-    
-    def encode(self, documents: str | list[str]) -> list[list[float]]:
+
+    @property
+    def dimension(self) -> int:
+        return self.encoder.get_sentence_embedding_dimension()
+
+    def _token_lengths(self, documents: list[str]) -> list[int]:
+        tokenized = self.encoder.tokenizer(documents, add_special_tokens=True, truncation=True, max_length=self.encoder.max_seq_length)
+        return [len(ids) for ids in tokenized["input_ids"]]
+
+    def _encode_batched(self, documents: list[str], batch_size: int) -> np.ndarray:
+        order = np.argsort(self._token_lengths(documents), kind="stable")
+
+        embeddings = np.empty((len(documents), self.dimension), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            embeddings[idx] = self.encoder.encode(
+                [documents[i] for i in idx],
+                batch_size=len(idx),
+                convert_to_numpy=True,
+                normalize_embeddings=self.normalize,
+            )
+        return embeddings
+
+    def encode(self, documents: str | list[str], batch_size: int | None = None) -> np.ndarray:
         if isinstance(documents, str):
             documents = [documents]
-        return [self.encoder.encode(document).tolist() for document in documents]
+        if not documents:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        batch_size = batch_size or self.batch_size
+        if self.cache is None:
+            return self._encode_batched(documents, batch_size)
+
+        keys = [self.cache.key(document) for document in documents]
+        cached = self.cache.get_many(keys)
+
+        missing: dict[str, str] = {}
+        for key, document, vector in zip(keys, documents, cached):
+            if vector is None:
+                missing.setdefault(key, document)
+
+        fresh = {}
+        if missing:
+            missing_keys = list(missing)
+            vectors = self._encode_batched(list(missing.values()), batch_size)
+            self.cache.put_many(missing_keys, vectors)
+            fresh = dict(zip(missing_keys, vectors))
+
+        embeddings = np.empty((len(documents), self.dimension), dtype=np.float32)
+        for i, (key, vector) in enumerate(zip(keys, cached)):
+            embeddings[i] = vector if vector is not None else fresh[key]
+        return embeddings
+
+
+class EncoderRegistry:
+    def __init__(self, default: TextEncoder, max_models: int = 3, cache_factory=None):
+        self.default = default
+        self.max_models = max(1, max_models)
+        self.cache_factory = cache_factory
+        self._encoders: OrderedDict[str, TextEncoder] = OrderedDict([(default.model_name, default)])
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str | None = None) -> TextEncoder:
+        model_name = model_name or self.default.model_name
+        with self._lock:
+            encoder = self._encoders.get(model_name)
+            if encoder is not None:
+                self._encoders.move_to_end(model_name)
+                return encoder
+
+        try:
+            encoder = TextEncoder(
+                model_name,
+                batch_size=self.default.batch_size,
+                normalize=self.default.normalize,
+                cache=self.cache_factory() if self.cache_factory else None,
+            )
+        except Exception as e:
+            raise Exception(f"Failed to load model '{model_name}': {str(e)}")
+
+        with self._lock:
+            encoder = self._encoders.setdefault(model_name, encoder)
+            self._encoders.move_to_end(model_name)
+            while len(self._encoders) > self.max_models:
+                evicted = next(name for name, cached in self._encoders.items() if cached is not self.default)
+                del self._encoders[evicted]
+            return encoder
+
+    def models(self) -> list[str]:
+        with self._lock:
+            return list(self._encoders)
+
+    def stats(self) -> dict:
+        with self._lock:
+            encoders = list(self._encoders.items())
+        return {name: encoder.cache.stats() if encoder.cache else None for name, encoder in encoders}
+
+
+def make_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(
+        max_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", "10000")),
+        directory=os.getenv("EMBEDDING_CACHE_DIR") or None,
+    )
+
 
+text_encoder = TextEncoder(
+    batch_size=int(os.getenv("ENCODER_BATCH_SIZE", "64")),
+    normalize=os.getenv("ENCODER_NORMALIZE", "false").lower() == "true",
+    num_threads=int(os.getenv("ENCODER_THREADS", "0")) or None,
+    cache=make_embedding_cache(),
+)
 
-text_encoder = TextEncoder()
+encoder_registry = EncoderRegistry(
+    text_encoder,
+    max_models=int(os.getenv("ENCODER_CACHE_MODELS", "3")),
+    cache_factory=make_embedding_cache,
+)
 
-__all__ = ["TextEncoder", "text_encoder"]
+__all__ = ["TextEncoder", "EncoderRegistry", "text_encoder", "encoder_registry"]
@@ -28,10 +28,14 @@ class QueryExpansionTemplate:
 
 
 class RAGPromptTemplate:
+    @staticmethod
+    def format_document(doc: dict) -> str:
+        return f"Document ID: {doc.get('id')}\nContent: {doc.get('content')}"
+
     @staticmethod
     def create_prompt(query: str, documents: list[dict]) -> str:
         context = "\n".join([
-            f"Document ID: {doc.get('id')}\nContent: {doc.get('content')}" 
+            RAGPromptTemplate.format_document(doc)
             for doc in documents
         ])
         
@@ -0,0 +1,42 @@
+import numpy as np
+
+from services.chunking_service import TextChunker
+
+
+def pack(lengths, window, overlap):
+    pieces = [f"p{i}" for i in range(len(lengths))]
+    chunks = TextChunker(encoder=None)._pack(pieces, np.asarray(lengths), window, overlap)
+    return [[int(piece[1:]) for piece in chunk.split(" ")] for chunk in chunks]
+
+
+def test_windows_overlap_by_whole_pieces():
+    assert pack([3, 3, 3, 3, 3], window=6, overlap=3) == [[0, 1], [1, 2], [2, 3], [3, 4]]
+
+
+def test_zero_overlap_tiles_the_text():
+    assert pack([3, 3, 3, 3, 3], window=6, overlap=0) == [[0, 1], [2, 3], [4]]
+
+
+def test_everything_fits_in_one_window():
+    assert pack([2, 2, 2], window=10, overlap=4) == [[0, 1, 2]]
+
+
+def test_oversized_piece_gets_its_own_chunk_and_progress_continues():
+    assert pack([10, 2, 2], window=5, overlap=2) == [[0], [1, 2]]
+
+
+def test_windows_respect_budget_and_overlap():
+    rng = np.random.default_rng(7)
+    lengths = rng.integers(1, 40, size=300)
+    window, overlap = 120, 30
+    chunks = pack(lengths, window, overlap)
+
+    covered = [i for chunk in chunks for i in chunk]
+    assert sorted(set(covered)) == list(range(len(lengths)))
+    for chunk in chunks:
+        assert chunk == list(range(chunk[0], chunk[-1] + 1))
+        assert len(chunk) == 1 or lengths[chunk].sum() <= window
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous[0] < current[0] <= previous[-1] + 1
+        shared = range(current[0], previous[-1] + 1)
+        assert lengths[list(shared)].sum() <= overlap
@@ -0,0 +1,65 @@
+import struct
+
+import pytest
+
+from database import Database
+
+
+@pytest.fixture
+def db():
+    return Database("postgres", "localhost", 5432, "postgres", None, "postgres")
+
+
+def test_vector_field_matches_pgvector_binary_format():
+    # vector_send: int16 dim, int16 unused, then big-endian float4 values.
+    expected = (
+        b"\x00\x00\x00\x10"
+        b"\x00\x03\x00\x00"
+        b"\x3f\x80\x00\x00"
+        b"\xc0\x20\x00\x00"
+        b"\x00\x00\x00\x00"
+    )
+    assert Database._copy_vector_field([1.0, -2.5, 0.0]) == expected
+
+
+def test_vector_field_accepts_numpy_float32():
+    np = pytest.importorskip("numpy")
+    vector = np.asarray([0.5, 2.0], dtype=np.float32)
+    assert Database._copy_vector_field(vector) == b"\x00\x00\x00\x0c\x00\x02\x00\x00\x3f\x00\x00\x00\x40\x00\x00\x00"
+
+
+def test_binary_row_encodes_text_integer_null_and_vector_fields(db):
+    row = {
+        "title": "Zażółć",
+        "content": "gęślą jaźń",
+        "page_url": None,
+        "content_hash": "abc",
+        "section_index": 3,
+        "chunk_index": None,
+        "embedding": [1.0],
+    }
+    title = "Zażółć".encode("utf-8")
+    content = "gęślą jaźń".encode("utf-8")
+    expected = b"".join((
+        b"\x00\x07",
+        struct.pack("!i", len(title)), title,
+        struct.pack("!i", len(content)), content,
+        b"\xff\xff\xff\xff",
+        b"\x00\x00\x00\x03abc",
+        b"\x00\x00\x00\x04\x00\x00\x00\x03",
+        b"\xff\xff\xff\xff",
+        b"\x00\x00\x00\x08\x00\x01\x00\x00\x3f\x80\x00\x00",
+    ))
+    assert db._copy_binary_row(row, Database.DOCUMENT_COLUMNS) == expected
+
+
+def test_binary_row_includes_id_when_copying_existing_rows(db):
+    row = {"id": 42, "title": None, "content": "x", "embedding": [0.0]}
+    encoded = db._copy_binary_row(row, ("id", *Database.DOCUMENT_COLUMNS))
+    assert encoded[:2] == struct.pack("!h", 8)
+    assert encoded[2:10] == b"\x00\x00\x00\x04\x00\x00\x00\x2a"
+
+
+def test_copy_header_and_trailer():
+    assert Database.COPY_BINARY_HEADER == b"PGCOPY\n\xff\r\n\x00" + b"\x00" * 8
+    assert Database.COPY_BINARY_TRAILER == b"\xff\xff"
@@ -0,0 +1,22 @@
+from crawlers.frontier import BloomFilter, normalize_url
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(5000)
+    urls = [f"https://pl.wikipedia.org/wiki/Strona_{i}" for i in range(5000)]
+    for url in urls:
+        bloom.add(url)
+    assert all(url in bloom for url in urls)
+
+
+def test_bloom_filter_false_positive_rate_stays_near_target():
+    bloom = BloomFilter(5000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(f"https://example.com/{i}")
+    false_positives = sum(f"https://example.org/{i}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.03
+
+
+def test_normalize_url_drops_fragment_and_default_port():
+    assert normalize_url("HTTPS://Example.COM:443/a?b=1#top") == "https://example.com/a?b=1"
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
@@ -0,0 +1,133 @@
+import time
+import threading
+
+import numpy as np
+import pytest
+
+from services.retrieval_service import ConcurrentRetriever
+
+
+class Encoder:
+    def encode(self, texts):
+        texts = [texts] if isinstance(texts, str) else texts
+        return np.zeros((len(texts), 2), dtype=np.float32)
+
+
+class Reranker:
+    def score(self, query, contents):
+        return [float(len(content)) for content in contents]
+
+
+def make_search(results, delays=None, errors=()):
+    def search(text, vector):
+        time.sleep((delays or {}).get(text, 0))
+        if text in errors:
+            raise ConnectionError(f"{text} is down")
+        return results.get(text, [])
+    return search
+
+
+@pytest.fixture
+def retriever():
+    retriever = ConcurrentRetriever(Encoder(), Reranker(), max_workers=4, deadline=5.0)
+    yield retriever
+    retriever.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def test_merges_expansions_and_keeps_best_score(retriever):
+    search = make_search({
+        "query": [(1, "a", "x", 0.9)],
+        "expanded": [(2, "b", "xxx", 0.8), (1, "a", "x", 0.95)],
+    })
+    retrieval = retriever.retrieve("query", search, ["expanded"], top_k=5)
+    assert [doc[0] for doc in retrieval.documents] == [2, 1]
+    assert retrieval.documents[1][3] == 0.95
+    assert not retrieval.timed_out
+
+
+def test_lower_distance_wins_when_higher_is_not_better(retriever):
+    search = make_search({
+        "query": [(1, "a", "x", 0.4)],
+        "expanded": [(1, "a", "x", 0.2)],
+    })
+    retrieval = retriever.retrieve("query", search, ["expanded"], higher_is_better=False)
+    assert retrieval.documents[0][3] == 0.2
+
+
+def test_original_search_failure_raises(retriever):
+    search = make_search({"expanded": [(2, "b", "y", 0.8)]}, errors={"query"})
+    with pytest.raises(RuntimeError, match="query is down"):
+        retriever.retrieve("query", search, ["expanded"])
+
+
+def test_failed_expansion_search_is_tolerated(retriever):
+    search = make_search({"query": [(1, "a", "x", 0.9)]}, errors={"expanded"})
+    retrieval = retriever.retrieve("query", search, ["expanded"])
+    assert [doc[0] for doc in retrieval.documents] == [1]
+
+
+def test_slow_expansion_search_hits_the_deadline(retriever):
+    search = make_search(
+        {"query": [(1, "a", "x", 0.9)], "slow": [(2, "b", "y", 0.8)]},
+        delays={"slow": 1.0},
+    )
+    start = time.monotonic()
+    retrieval = retriever.retrieve("query", search, ["slow"], deadline=0.2)
+    assert time.monotonic() - start < 0.8
+    assert retrieval.timed_out
+    assert [doc[0] for doc in retrieval.documents] == [1]
+    assert retriever.metrics()["deadline_hits"] == 1
+
+
+def test_no_finished_search_before_the_deadline_raises(retriever):
+    search = make_search({"query": [(1, "a", "x", 0.9)]}, delays={"query": 1.0, "expanded": 1.0})
+    with pytest.raises(TimeoutError):
+        retriever.retrieve("query", search, ["expanded"], deadline=0.2)
+
+
+def test_search_deadline_starts_with_the_first_expansion(retriever):
+    def expansions():
+        time.sleep(0.3)
+        yield "late"
+
+    search = make_search({"query": [(1, "a", "x", 0.9)], "late": [(3, "c", "zz", 0.7)]})
+    retrieval = retriever.retrieve("query", search, expansions(), deadline=0.5)
+    assert not retrieval.timed_out
+    assert {doc[0] for doc in retrieval.documents} == {1, 3}
+
+
+def test_cached_expansions_are_searched_in_one_batch(retriever):
+    calls = []
+
+    def search_many(texts, vectors):
+        calls.append(list(texts))
+        return [[(i + 10, "t", "w" * (i + 1), 0.5)] for i, _ in enumerate(texts)]
+
+    search = make_search({"query": [(1, "a", "x", 0.9)]})
+    seen = []
+    retrieval = retriever.retrieve("query", search, ["e1", "e2"], search_many=search_many, on_expanded=seen.append)
+    assert calls == [["e1", "e2"]]
+    assert seen == [["query", "e1", "e2"]]
+    assert {doc[0] for doc in retrieval.documents} == {1, 10, 11}
+
+
+def test_abandoned_expansion_stream_is_closed(retriever):
+    closed = threading.Event()
+    produced = []
+
+    def expansions():
+        try:
+            yield "slow"
+            time.sleep(0.3)
+            produced.append("more")
+            yield "more"
+            produced.append("never")
+            yield "never"
+        finally:
+            closed.set()
+
+    search = make_search({"query": [(1, "a", "x", 0.9)]}, delays={"slow": 1.0})
+    retrieval = retriever.retrieve("query", search, expansions(), deadline=0.2)
+    assert retrieval.timed_out
+    assert closed.wait(1.0)
+    assert produced == ["more"]
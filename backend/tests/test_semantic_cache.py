@@ -0,0 +1,52 @@
+from services.semantic_cache import SemanticCache
+
+
+def test_exact_hit_ignores_case_whitespace_and_trailing_punctuation():
+    cache = SemanticCache()
+    cache.put("answer", "glo_table", "What is  RAG?", "value")
+    assert cache.get("answer", "glo_table", "what is rag") == "value"
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_semantic_hit_requires_threshold_and_matching_scope():
+    cache = SemanticCache(threshold=0.9)
+    cache.put("answer", "glo_table", "first prompt", "value", [1.0, 0.0])
+    assert cache.get("answer", "glo_table", "other prompt", [0.99, 0.05]) == "value"
+    assert cache.get("answer", "glo_table", "other prompt", [0.5, 0.5]) is None
+    assert cache.get("answer", "other_table", "other prompt", [1.0, 0.0]) is None
+    assert cache.get("expansion", "glo_table", "other prompt", [1.0, 0.0]) is None
+
+
+def test_put_replaces_the_cached_vector_matrix():
+    cache = SemanticCache(threshold=0.9)
+    cache.put("answer", "t", "a", "old", [1.0, 0.0])
+    assert cache.get("answer", "t", "b", [1.0, 0.0]) == "old"
+    cache.put("answer", "t", "a", "new", [0.0, 1.0])
+    assert cache.get("answer", "t", "b", [1.0, 0.0]) is None
+    assert cache.get("answer", "t", "b", [0.0, 1.0]) == "new"
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    import services.semantic_cache as module
+
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    cache = SemanticCache(ttl=10)
+    cache.put("answer", "t", "prompt", "value", [1.0])
+    now[0] += 11
+    assert cache.get("answer", "t", "prompt", [1.0]) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_and_invalidation():
+    cache = SemanticCache(max_entries=2)
+    cache.put("answer", "a", "one", 1)
+    cache.put("answer", "b", "two", 2)
+    assert cache.get("answer", "a", "one") == 1
+    cache.put("answer", "b", "three", 3)
+    assert cache.get("answer", "b", "two") is None
+    assert cache.get("answer", "a", "one") == 1
+
+    cache.invalidate("a")
+    assert cache.get("answer", "a", "one") is None
+    assert cache.get("answer", "b", "three") == 3
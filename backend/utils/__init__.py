@@ -1,3 +1,3 @@
-from .helpers import clean_text, clean_documents
+from .helpers import clean_text, clean_documents, content_hash
 
-__all__ = ["clean_text", "clean_documents"]
\ No newline at end of file
+__all__ = ["clean_text", "clean_documents", "content_hash"]
\ No newline at end of file
@@ -1,4 +1,5 @@
 import re
+import hashlib
 
 def clean_text(text: str) -> str:
     if text is None:
@@ -10,3 +11,7 @@ def clean_text(text: str) -> str:
 
 def clean_documents(documents: list[str]) -> list[str]:
     return [clean_text(document) for document in documents]
+
+
+def content_hash(title: str | None, text: str) -> str:
+    return hashlib.blake2b(f"{title or ''}\n{text}".encode("utf-8"), digest_size=16).hexdigest()
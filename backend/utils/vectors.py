@@ -0,0 +1,34 @@
+import numpy as np
+
+SCORE_DIGITS = {"cosine": 2, "l2": 4, "inner_product": 4}
+
+def distances(matrix: np.ndarray, query: np.ndarray, metric: str = "cosine", sq_norms: np.ndarray | None = None) -> np.ndarray:
+    if sq_norms is None:
+        sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+    return distances_from_dots(matrix @ query, query, metric, sq_norms)
+
+def distances_from_dots(dots: np.ndarray, query: np.ndarray, metric: str, sq_norms: np.ndarray) -> np.ndarray:
+    if metric == "l2":
+        return np.sqrt(np.maximum(sq_norms - 2 * dots + query @ query, 0))
+    if metric == "inner_product":
+        return -dots
+    denom = np.sqrt(sq_norms) * np.linalg.norm(query)
+    return 1 - np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+def top_k(values: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(values))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(values, k - 1)[:k]
+    return top[np.argsort(values[top])]
+
+def to_score(distance: float, metric: str = "cosine") -> float:
+    if metric in ("l2", "inner_product"):
+        return round(float(distance), SCORE_DIGITS[metric])
+    return round((1 - float(distance)) * 100, SCORE_DIGITS["cosine"])
@@ -30,15 +30,37 @@ function PromptModel() {
     if (!prompt.trim()) return;
 
     setIsPrompting(true);
+    setAnswer("");
+    setDocs([]);
     try {
       const res = await fetch(`${APP_URL}/prompt`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ prompt: prompt, apiKey: null }),
+        headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+        body: JSON.stringify({ prompt: prompt, apiKey: null, stream: true }),
       });
-      const data = await res.json();
-      setAnswer(data.answer);
-      setDocs(data.docs);
+      if (!res.body) return;
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split("\n\n");
+        buffer = events.pop() ?? "";
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = raw.match(/^data: (.*)$/m)?.[1];
+          if (!event || data === undefined) continue;
+
+          if (event === "docs") setDocs(JSON.parse(data));
+          else if (event === "token") setAnswer((prev) => prev + JSON.parse(data));
+          else if (event === "error") console.error("Error prompting model:", JSON.parse(data).message);
+        }
+      }
     } catch (error) {
       console.error("Error prompting model:", error);
     } finally {
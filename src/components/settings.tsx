@@ -17,6 +17,8 @@ import {
   LLMProvider,
   PostgresMetric,
   MySQLMetric,
+  LocalMetric,
+  RetrievalMode,
   type SettingsType,
 } from "../types/settings";
 
@@ -53,8 +55,12 @@ function Settings() {
       });
 
       if (response.ok) {
+        const data = await response.json();
         setLocalSettings(newSettings);
         console.log("Settings saved");
+        for (const warning of data.warnings ?? []) {
+          console.warn(warning);
+        }
         setIsOpen(false);
       } else {
         console.error("Failed to save settings");
@@ -127,11 +133,18 @@ function Settings() {
                     <RadioGroupItem value={DatabaseType.MySQL} id="mysql" />
                     <Label htmlFor="mysql">MySQL</Label>
                   </div>
+                  <div className="flex items-center space-x-2">
+                    <RadioGroupItem value={DatabaseType.Local} id="local" />
+                    <Label htmlFor="local">Local (embedded)</Label>
+                  </div>
                 </RadioGroup>
               </div>
 
               <div>
-                <Label className="text-base font-medium">Metric</Label>
+                <Label className="text-base font-medium">Metric for new collections</Label>
+                <p className="text-sm text-muted-foreground">
+                  Existing collections keep the metric they were created with
+                </p>
                 <RadioGroup
                   value={localSettings.metric}
                   onValueChange={(value) => {
@@ -140,6 +153,11 @@ function Settings() {
                         ...localSettings,
                         metric: value as PostgresMetric,
                       });
+                    } else if (localSettings.database === DatabaseType.Local) {
+                      setLocalSettings({
+                        ...localSettings,
+                        metric: value as LocalMetric,
+                      });
                     } else {
                       setLocalSettings({
                         ...localSettings,
@@ -174,6 +192,30 @@ function Settings() {
                 </RadioGroup>
               </div>
 
+              {localSettings.database === DatabaseType.Postgres && (
+                <div>
+                  <Label className="text-base font-medium">Retrieval</Label>
+                  <RadioGroup
+                    value={localSettings.retrievalMode ?? RetrievalMode.Vector}
+                    onValueChange={(value) =>
+                      setLocalSettings({
+                        ...localSettings,
+                        retrievalMode: value as RetrievalMode,
+                      })
+                    }
+                  >
+                    <div className="flex items-center space-x-2">
+                      <RadioGroupItem value={RetrievalMode.Vector} id="vector" />
+                      <Label htmlFor="vector">Vector</Label>
+                    </div>
+                    <div className="flex items-center space-x-2">
+                      <RadioGroupItem value={RetrievalMode.Hybrid} id="hybrid" />
+                      <Label htmlFor="hybrid">Hybrid (full-text + vector)</Label>
+                    </div>
+                  </RadioGroup>
+                </div>
+              )}
+
               <div>
                 <Label className="text-base font-medium">LLM Provider</Label>
                 <RadioGroup
@@ -1,6 +1,7 @@
 export enum DatabaseType {
   Postgres = 'postgres',
-  MySQL = 'mysql'
+  MySQL = 'mysql',
+  Local = 'local'
 }
 
 export enum PostgresMetric {
@@ -13,6 +14,16 @@ export enum MySQLMetric {
   L2 = 'l2'
 }
 
+export enum LocalMetric {
+  Cosine = 'cosine',
+  L2 = 'l2'
+}
+
+export enum RetrievalMode {
+  Vector = 'vector',
+  Hybrid = 'hybrid'
+}
+
 export enum LLMProvider {
   Ollama = 'ollama',
   OpenAI = 'openai',
@@ -22,12 +33,18 @@ export enum LLMProvider {
 interface SettingsBase {
   llmProvider: LLMProvider;
   textEncoder: string;
+  reranker?: string;
   openAiApiKey: string;
+  semanticCacheThreshold?: number;
+  retrievalDeadline?: number | null;
 }
 
 interface PostgresSettings extends SettingsBase {
   database: DatabaseType.Postgres;
   metric: PostgresMetric;
+  efSearch?: number | null;
+  ivfProbes?: number | null;
+  retrievalMode?: RetrievalMode;
 }
 
 interface MySQLSettings extends SettingsBase {
@@ -35,4 +52,10 @@ interface MySQLSettings extends SettingsBase {
   metric: MySQLMetric;
 }
 
-export type SettingsType = PostgresSettings | MySQLSettings
\ No newline at end of file
+interface LocalSettings extends SettingsBase {
+  database: DatabaseType.Local;
+  metric: LocalMetric;
+  efSearch?: number | null;
+}
+
+export type SettingsType = PostgresSettings | MySQLSettings | LocalSettings
\ No newline at end of file